@@ -0,0 +1,90 @@
+# app/core/config.py
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Level of the service's own loggers ("app.*"; DEBUG shows per-request
+# events such as dropped hybrid legs)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+
+# Which engine serves /api/search/:
+#   "atlas" -> MongoDB Atlas $search (default)
+#   "local" -> in-process BM25 index built from hacks_all
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "atlas").strip().lower()
+
+if SEARCH_BACKEND not in ("atlas", "local"):
+    raise RuntimeError(
+        f"SEARCH_BACKEND must be 'atlas' or 'local', got {SEARCH_BACKEND!r}")
+
+# Atlas count mode for /api/search/:
+#   "total"      -> exact count (scans every match)
+#   "lowerBound" -> exact up to SEARCH_COUNT_THRESHOLD, then reported as "N+"
+SEARCH_COUNT_MODE = os.getenv("SEARCH_COUNT_MODE", "total")
+SEARCH_COUNT_THRESHOLD = int(os.getenv("SEARCH_COUNT_THRESHOLD", "1000"))
+
+if SEARCH_COUNT_MODE not in ("total", "lowerBound"):
+    raise RuntimeError(
+        f"SEARCH_COUNT_MODE must be 'total' or 'lowerBound', got {SEARCH_COUNT_MODE!r}")
+
+# In-process response cache for the search router (0 entries disables it)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+
+# How often the API re-reads the hacks_all generation counter
+CORPUS_GENERATION_POLL_SECONDS = float(
+    os.getenv("CORPUS_GENERATION_POLL_SECONDS", "5"))
+
+# Dense embeddings for semantic similarity (python -m app.similarity.cli embed)
+#   "ollama"  -> local Ollama /api/embed with EMBEDDING_MODEL (CPU is fine)
+#   "hashing" -> model-free feature hashing, for dev/CI boxes without Ollama
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "ollama").strip().lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+OLLAMA_EMBED_URL = os.getenv(
+    "OLLAMA_EMBED_URL", "http://localhost:11434/api/embed")
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", "data/embeddings")
+
+if EMBEDDING_BACKEND not in ("ollama", "hashing"):
+    raise RuntimeError(
+        f"EMBEDDING_BACKEND must be 'ollama' or 'hashing', got {EMBEDDING_BACKEND!r}")
+
+# mode=hybrid on /api/search/: lexical + vector legs fused with
+# reciprocal rank fusion. Each leg has its own latency budget; a leg
+# that misses it is dropped from the response instead of stalling it.
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "100"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_LEXICAL_BUDGET_MS = float(os.getenv("HYBRID_LEXICAL_BUDGET_MS", "1500"))
+HYBRID_VECTOR_BUDGET_MS = float(os.getenv("HYBRID_VECTOR_BUDGET_MS", "500"))
+# Ollama timeout for embedding a query outside hybrid search (semantic
+# search and similar); hybrid uses what is left of its vector budget
+EMBED_QUERY_TIMEOUT_SECONDS = float(os.getenv("EMBED_QUERY_TIMEOUT_SECONDS", "10"))
+
+# Queries whose first page has fewer hits than this get a spelling
+# correction ("did you mean") from the corpus vocabulary
+SPELLING_MIN_HITS = int(os.getenv("SPELLING_MIN_HITS", "3"))
+
+# POST /api/search/batch: max sub-requests and their shared deadline
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_TIMEOUT_MS = float(os.getenv("BATCH_TIMEOUT_MS", "3000"))
+
+# GET /api/search/export: documents per server-side cursor batch
+# (and per NDJSON chunk written to the client)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# GET /metrics: request latency/size histograms and Mongo command
+# timings in Prometheus text format. Set to 0 to stop recording.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# Sampled query log (search, category and similar requests), appended
+# to QUERY_LOG_PATH off the request path. 0 disables it.
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "data/query_log.ndjson")
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", "0.1"))
+QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Startup warm-up: replay the WARMUP_QUERIES most frequent of the last
+# WARMUP_WINDOW logged requests before serving (0 disables it)
+WARMUP_QUERIES = int(os.getenv("WARMUP_QUERIES", "200"))
+WARMUP_WINDOW = int(os.getenv("WARMUP_WINDOW", "20000"))
+WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "8"))
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "30"))
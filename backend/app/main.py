@@ -1,16 +1,87 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
-from app.routers import search
+from app.routers import metrics as metrics_router, search
+from app.core import config
 from app.core.cors import setup_cors
+from app.services import (
+    category_stats, corpus, local_search, metrics, mongo, query_log, spelling, suggest,
+)
+from app.similarity import ann
+
+# Loggers under "app" (e.g. app.routers.search) print like the rest of
+# the service; uvicorn only configures its own loggers
+_app_logger = logging.getLogger("app")
+if not _app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("[%(name)s] %(levelname)s %(message)s"))
+    _app_logger.addHandler(_handler)
+    _app_logger.setLevel(config.LOG_LEVEL)
+    _app_logger.propagate = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await mongo.ensure_indexes()
+    except Exception as e:
+        print(f"[startup] Could not create indexes: {e}")
+    await category_stats.ensure_built()
+
+    # Track the hacks_all generation so caches can drop stale entries
+    await corpus.refresh_generation()
+    generation_watcher = asyncio.create_task(corpus.watch_generation())
+
+    # Build the in-process index before serving the first query
+    if config.SEARCH_BACKEND == "local":
+        await run_in_threadpool(local_search.get_index)
+
+    # Map the embedding matrix (pages are read lazily by the OS)
+    await run_in_threadpool(ann.get_vector_index)
+
+    # Typeahead and spelling indexes, rebuilt in the background when
+    # hacks_all changes
+    await run_in_threadpool(suggest.get_index)
+    await run_in_threadpool(spelling.get_index)
+    refreshers = [
+        asyncio.create_task(suggest.keep_fresh()),
+        asyncio.create_task(spelling.keep_fresh()),
+    ]
+    if config.SEARCH_BACKEND == "local":
+        refreshers.append(asyncio.create_task(local_search.keep_fresh()))
+
+    # Replay the most frequent recent queries so the first requests
+    # after a deploy don't all go to a cold pool, index and cache
+    if config.WARMUP_QUERIES > 0:
+        entries = await run_in_threadpool(query_log.top_queries, config.WARMUP_QUERIES)
+        await search.warm_up(entries)
+    query_log.query_logger.start()
+
+    yield
+
+    await run_in_threadpool(query_log.query_logger.stop)
+
+    for task in (generation_watcher, *refreshers):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    mongo.close_clients()
+
 
-app = FastAPI(title="Ikea Hacks IR API")
+app = FastAPI(title="Ikea Hacks IR API", lifespan=lifespan)
 
 setup_cors(app)
+app.add_middleware(metrics.MetricsMiddleware)
 
 app.include_router(search.router)
+app.include_router(metrics_router.router)
 
 @app.get("/")
-def root():
+async def root():
     return {"message": " backend is running"}
 
 
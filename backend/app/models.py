@@ -1,6 +1,22 @@
 # app/models.py
-from typing import List, Optional
-from pydantic import BaseModel, HttpUrl
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, HttpUrl, field_validator
+
+# Stored hack fields that search hits can carry (see ?fields= on /api/search/)
+HIT_FIELDS = (
+    "source", "url", "author", "categories", "content", "date",
+    "excerpt", "image_url", "tags", "title",
+)
+
+
+def iso_date(value: Any) -> Any:
+    """BSON dates (naive UTC from pymongo) as ISO 8601 strings with Z."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat() + "Z"
+    return value
 
 class Hack(BaseModel):
     id: Optional[str] = None
@@ -16,9 +32,70 @@ class Hack(BaseModel):
     excerpt: Optional[str] = None
     score: Optional[float] = None
 
+    _date_to_str = field_validator("date", mode="before")(iso_date)
+
+class FacetBucket(BaseModel):
+    value: str
+    count: int
+
 class SearchResult(BaseModel):
     total: int          
+    total_is_lower_bound: bool = False  # True -> show total as "N+"
     page: int            
     page_size: int      
     total_pages: int     
     hits: List[Hack]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to fetch the next page
+    timings_ms: Optional[Dict[str, float]] = None  # per-leg times (mode=hybrid)
+    dropped_legs: Optional[List[str]] = None  # legs that missed their budget
+    did_you_mean: Optional[str] = None  # spelling correction of a low-hit query
+    corrected_query: Optional[str] = None  # query actually run (autocorrect=true)
+    facets: Optional[Dict[str, List[FacetBucket]]] = None  # facets=true
+
+
+class Snippet(BaseModel):
+    path: str                     # "title" or "content"
+    text: str                     # bounded passage of that field
+    highlights: List[List[int]]   # [start, end) offsets of matches in text
+
+
+class HitSummary(BaseModel):
+    """
+    Search hit as sent by the fast response path of /api/search/:
+    plain strings (no HttpUrl revalidation), and only id, score and the
+    fields listed in ?fields= (all of HIT_FIELDS by default).
+    """
+    id: str
+    score: Optional[float] = None
+    source: Optional[str] = None
+    title: Optional[str] = None
+    excerpt: Optional[str] = None
+    author: Optional[str] = None
+    date: Optional[str] = None
+    url: Optional[str] = None
+    image_url: Optional[str] = None
+    categories: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    content: Optional[str] = None
+    snippets: Optional[List[Snippet]] = None  # with ?highlight=true
+
+
+class SearchSummaryResult(SearchResult):
+    hits: List[HitSummary]
+
+
+class Suggestion(BaseModel):
+    text: str
+    kind: str   # "product", "category", "tag" or "title"
+    count: int  # hacks carrying it (1 for a title)
+
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None  # echoed back to match results to requests
+    type: Literal["search", "category", "similar", "top_categories"]
+    params: Dict[str, Any] = {}  # query/path params of the matching GET route
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+    timeout_ms: Optional[int] = None  # shared deadline (capped at BATCH_TIMEOUT_MS)
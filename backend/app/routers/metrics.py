@@ -0,0 +1,37 @@
+# app/routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services import metrics
+from app.services.cache import response_cache
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_lines() -> list:
+    stats = response_cache.stats()
+    lines = []
+    for name, key, help_text in (
+        ("response_cache_hits_total", "hits_by_kind", "Response cache hits, by cached route kind."),
+        ("response_cache_misses_total", "misses_by_kind", "Response cache misses, by cached route kind."),
+    ):
+        values = {(("kind", kind),): n for kind, n in stats[key].items()}
+        lines.extend(metrics.render_counter(name, help_text, values))
+    lines.extend(metrics.render_counter(
+        "response_cache_evictions_total", "Entries evicted by the LRU bound.",
+        {(): stats["evictions"]}))
+    lines.extend([
+        "# HELP response_cache_entries Entries held by the response cache.",
+        "# TYPE response_cache_entries gauge",
+        f"response_cache_entries {stats['entries']}",
+    ])
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape endpoint."""
+    body = "\n".join(metrics.render() + _cache_lines()) + "\n"
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,138 +1,744 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError, create_model
+from starlette.concurrency import run_in_threadpool
 from bson import ObjectId
-from typing import List
+from typing import Any, List, Optional, Sequence, Tuple
+import asyncio
+import inspect
+import logging
 import math
+import time
+from datetime import date, datetime, time as dt_time, timedelta
 
-from app.models import Hack, SearchResult
-from app.services import mongo
-from app.utils import mongo_doc_to_hack
+import orjson
+
+from app.core import config
+from app.models import (
+    HIT_FIELDS,
+    BatchRequest,
+    BatchSubRequest,
+    Hack,
+    SearchResult,
+    SearchSummaryResult,
+    Suggestion,
+)
+from app.services import (
+    category_stats, local_search, metrics, mongo, snippets, spelling, suggest,
+)
+from app.services.cache import normalize_query, response_cache
+from app.services.facets import atlas_facet_collector, read_atlas_facets
+from app.services.query_log import query_logger
+from app.similarity import ann, neighbours
+from app.utils import (
+    decode_cursor,
+    encode_cursor,
+    mongo_doc_to_hack,
+    mongo_doc_to_hit,
+)
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
+logger = logging.getLogger(__name__)
 
-@router.get("/", response_model=SearchResult)
-def search_hacks(
-    query: str = Query(..., description="Search term"),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(10, ge=1, le=50),
-    db=Depends(mongo.get_db),
-):
+
+def _compound_query(query: str, filters: Optional[dict] = None) -> dict:
     """
-    Search API to query the hacks_all collection using MongoDB Atlas Search.
-    - Uses $search for ranked hits
-    - Uses $searchMeta for true total count
+    Compound text query shared by $search and $searchMeta. Filters go
+    in compound.filter, which restricts matches inside the index
+    without affecting scores.
     """
-    index_name = mongo.MONGO_SEARCH_INDEX
-    collection = db["hacks_all"]
+    compound = {
+        "must": [
+            {
+                "text": {
+                    "query": query,
+                    "path": ["title", "content"],
+                    "fuzzy": {"maxEdits": 1}
+                }
+            }
+        ],
+        "should": [
+            {"text": {"query": query, "path": [
+                "categories", "tags"]}}
+        ]
+    }
+    clauses = _filter_clauses(filters or {})
+    if clauses:
+        compound["filter"] = clauses
+    return compound
+
+
+def _filter_clauses(filters: dict) -> List[dict]:
+    clauses = []
+    if filters.get("source"):
+        clauses.append({"equals": {"path": "source", "value": filters["source"]}})
+    if filters.get("category"):
+        clauses.append({"equals": {"path": "categories", "value": filters["category"]}})
+    date_range = {}
+    if filters.get("date_gte"):
+        date_range["gte"] = filters["date_gte"]
+    if filters.get("date_lt"):
+        date_range["lt"] = filters["date_lt"]
+    if date_range:
+        clauses.append({"range": {"path": "date", **date_range}})
+    return clauses
+
+
+def _mongo_filter(filters: dict) -> dict:
+    """The same filters as a find() query."""
+    query: dict = {}
+    if filters.get("source"):
+        query["source"] = filters["source"]
+    if filters.get("category"):
+        query["categories"] = filters["category"]
+    if filters.get("date_gte"):
+        query.setdefault("date", {})["$gte"] = filters["date_gte"]
+    if filters.get("date_lt"):
+        query.setdefault("date", {})["$lt"] = filters["date_lt"]
+    return query
+
+
+def _parse_filters(source: Optional[str], category: Optional[str],
+                   date_from: Optional[date], date_to: Optional[date]) -> dict:
+    """Search filters from query params; date_to is inclusive."""
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=400, detail="date_from must not be after date_to")
+    filters = {}
+    if source:
+        filters["source"] = source
+    if category:
+        filters["category"] = category
+    if date_from:
+        filters["date_gte"] = datetime.combine(date_from, dt_time.min)
+    if date_to:
+        filters["date_lt"] = datetime.combine(date_to + timedelta(days=1), dt_time.min)
+    return filters
+
+
+def _count_option(count_mode: str) -> dict:
+    if count_mode == "lowerBound":
+        return {"type": "lowerBound",
+                "threshold": config.SEARCH_COUNT_THRESHOLD}
+    return {"type": "total"}
+
+
+def _search_options(query: str, count_mode: Optional[str], facets: bool,
+                    filters: Optional[dict] = None) -> dict:
+    """
+    Index, operator (or facet collector) and count shared by $search
+    and $searchMeta; count_mode None skips counting.
+    """
+    options = {"index": mongo.MONGO_SEARCH_INDEX}
+    if count_mode is not None:
+        options["count"] = _count_option(count_mode)
+    operator = {"compound": _compound_query(query, filters)}
+    if facets:
+        options["facet"] = atlas_facet_collector(operator)
+    else:
+        options.update(operator)
+    return options
 
-    # ---------- 1) $search for the current page of hits ----------
-    skip = (page - 1) * page_size
+
+def _read_count(meta: dict) -> Tuple[int, bool]:
+    """Return (total, total_is_lower_bound) from a SEARCH_META document."""
+    count = meta.get("count") or {}
+    if "total" in count:
+        return count["total"], False
+    lower_bound = count.get("lowerBound", 0)
+    return lower_bound, lower_bound >= config.SEARCH_COUNT_THRESHOLD
+
+
+async def _atlas_search(collection, query: str, skip: int, limit: int,
+                        count_mode: str = "total",
+                        search_after: Optional[str] = None,
+                        fields: Sequence[str] = HIT_FIELDS,
+                        highlight: bool = False,
+                        facets: bool = False,
+                        filters: Optional[dict] = None):
+    """
+    Run the Atlas Search query for one page of hits in a single round trip.
+    - Uses $search for ranked hits, starting after `search_after`
+      (a searchSequenceToken) when given instead of $skip-ing
+    - Projects only id, score and `fields` (plus Atlas highlights
+      on title/content when `highlight` is set)
+    - Reads the count, and the facet buckets when `facets` is set,
+      from $$SEARCH_META on the returned hits
+    Returns (total, total_is_lower_bound, hit_docs, last_token, facet_buckets);
+    facet_buckets is None unless `facets` is set.
+    """
+    search_stage = _search_options(query, count_mode, facets, filters)
+    if search_after is not None:
+        search_stage["searchAfter"] = search_after
+        skip = 0
+    if highlight:
+        search_stage["highlight"] = snippets.highlight_option()
 
     search_pipeline = [
-        {
-            "$search": {
-                "index": index_name,
-                "compound": {
-                    "must": [
-                        {
-                            "text": {
-                                "query": query,
-                                "path": ["title", "content"],
-                                "fuzzy": {"maxEdits": 1}
-                            }
-                        }
-                    ],
-                    "should": [
-                        {"text": {"query": query, "path": [
-                            "categories", "tags"]}}
-                    ]
-                }
-            }
-        },
+        {"$search": search_stage},
+        {"$skip": skip},
+        {"$limit": limit},
         {
             "$project": {
                 "_id": 0,
                 "id": {"$toString": "$_id"},
-                "source": 1,
-                "url": 1,
-                "author": 1,
-                "categories": 1,
-                "content": 1,
-                "date": 1,
-                "excerpt": 1,
-                "image_url": 1,
-                "tags": 1,
-                "title": 1,
+                **{field: 1 for field in fields},
                 "score": {"$meta": "searchScore"},
+                "token": {"$meta": "searchSequenceToken"},
+                "meta": "$$SEARCH_META",
+                **({"highlights": {"$meta": "searchHighlights"}}
+                   if highlight else {}),
             }
         },
-        {"$skip": skip},
-        {"$limit": page_size},
     ]
 
-    hit_docs = list(collection.aggregate(search_pipeline))
-    hits: List[Hack] = [Hack(**doc) for doc in hit_docs]
+    hit_docs = await collection.aggregate(search_pipeline).to_list(length=None)
+    if hit_docs:
+        meta = hit_docs[0]["meta"]
+        last_token = hit_docs[-1]["token"]
+        for doc in hit_docs:
+            doc.pop("meta", None)
+            doc.pop("token", None)
+        total, is_lower_bound = _read_count(meta)
+        return (total, is_lower_bound, hit_docs, last_token,
+                read_atlas_facets(meta) if facets else None)
 
-    # ---------- 2) $searchMeta to get true total matches ----------
-    count_pipeline = [
-        {
-            "$searchMeta": {
-                "index": index_name,
-                "compound": {
-                    "must": [
-                        {
-                            "text": {
-                                "query": query,
-                                "path": ["title", "content"],
-                                "fuzzy": {"maxEdits": 1}
-                            }
-                        }
-                    ],
-                    "should": [
-                        {"text": {"query": query, "path": [
-                            "categories", "tags"]}}
-                    ]
-                },
-                "count": {
-                    "type": "total",
-                },
+    if skip == 0 and search_after is None:
+        return 0, False, [], None, read_atlas_facets({}) if facets else None
+
+    # Page past the last hit: no document carries SEARCH_META, so ask for it
+    meta_docs = await collection.aggregate([
+        {"$searchMeta": _search_options(query, count_mode, facets, filters)}
+    ]).to_list(length=1)
+    meta = meta_docs[0] if meta_docs else {}
+    total, is_lower_bound = _read_count(meta)
+    return (total, is_lower_bound, [], None,
+            read_atlas_facets(meta) if facets else None)
+
+
+def _parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Validate ?fields= (comma-separated HIT_FIELDS); default is all."""
+    if not fields:
+        return HIT_FIELDS
+    requested = tuple(dict.fromkeys(
+        f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in HIT_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {unknown}; allowed: {list(HIT_FIELDS)}",
+        )
+    return requested
+
+
+def _to_hit(doc: dict, fields: Sequence[str], query: str, highlight: bool) -> dict:
+    hit = mongo_doc_to_hit(doc, fields)
+    if highlight:
+        hit["snippets"] = snippets.hit_snippets(doc, query)
+    return hit
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _is_count(value: Any, minimum: int) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+def _parse_cursor(cursor: Optional[str], **bound: Any) -> dict:
+    """
+    Decode and check a next_cursor. Its state may hold
+        "p"   page number it leads to (echoed as `page`)
+        "o"   offset (local backend, hybrid)
+        "t"   Atlas searchSequenceToken
+        "id"  last _id of a category page
+    plus the request values in `bound` it was issued for (query, mode,
+    category); a cursor from another request is rejected.
+    """
+    if cursor is None:
+        return {}
+    try:
+        state = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    valid = (
+        _is_count(state.get("p", 1), 1)
+        and _is_count(state.get("o", 0), 0)
+        and isinstance(state.get("t", ""), str)
+        and isinstance(state.get("id", ""), str)
+        and ObjectId.is_valid(state.get("id", "0" * 24))
+    )
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if any(state.get(key) != value for key, value in bound.items()):
+        raise HTTPException(status_code=400, detail="Cursor does not match this request")
+    return state
+
+
+async def _hacks_by_ids(collection, scored: List[Tuple[str, float]]) -> List[Hack]:
+    """Fetch hacks for (id, score) pairs, keeping their order."""
+    obj_ids = [ObjectId(hack_id) for hack_id, _ in scored]
+    docs = await collection.find({"_id": {"$in": obj_ids}}).to_list(
+        length=len(obj_ids))
+    docs_by_id = {str(doc["_id"]): doc for doc in docs}
+    return [
+        mongo_doc_to_hack({**docs_by_id[hack_id], "score": score})
+        for hack_id, score in scored if hack_id in docs_by_id
+    ]
+
+
+async def _vector_index():
+    index = await run_in_threadpool(ann.get_vector_index)
+    if index is None:
+        raise HTTPException(
+            status_code=503, detail="Semantic index is not available")
+    return index
+
+
+async def _run_leg(name: str, budget_ms: float, coro, timings: dict, dropped: list):
+    """Await one hybrid leg within its budget; record its time, None if dropped."""
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout=budget_ms / 1000.0)
+    except asyncio.TimeoutError:
+        reason = "budget"
+        logger.debug("%s leg exceeded its %.0f ms budget", name, budget_ms)
+    except HTTPException as e:
+        reason = "unavailable"
+        logger.debug("%s leg unavailable: %s", name, e.detail)
+    except Exception as e:
+        reason = "error"
+        logger.debug("%s leg failed: %s", name, e)
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000.0, 2)
+    # Counted, not logged: when a leg is slow every hybrid query drops it
+    metrics.hybrid_dropped.inc((("leg", name), ("reason", reason)))
+    dropped.append(name)
+    return None
+
+
+def _rrf(rankings: List[List[str]], k: int) -> List[Tuple[str, float]]:
+    """Reciprocal rank fusion of ranked id lists, best first."""
+    scores: dict = {}
+    for ranking in rankings:
+        for rank, hack_id in enumerate(ranking, start=1):
+            scores[hack_id] = scores.get(hack_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+async def _hybrid_search(db, query: str, skip: int, limit: int,
+                         count_mode: str, fields: Sequence[str],
+                         highlight: bool = False, facets: bool = False,
+                         filters: Optional[dict] = None):
+    """
+    Run the lexical leg (Atlas or local BM25) and the vector leg
+    concurrently, each within its budget, and fuse them with RRF.
+    Returns (total, hit dicts, timings_ms, dropped_legs, facet_buckets);
+    facets describe the lexical matches (None if that leg was dropped).
+    The vector leg knows no fields, so its candidates are filtered with
+    one Mongo query.
+    """
+    collection = db["hacks_all"]
+    depth = max(config.HYBRID_CANDIDATES, skip + limit)
+
+    async def lexical_leg():
+        if config.SEARCH_BACKEND == "local":
+            index = local_search.get_index()
+            _, docs = await run_in_threadpool(
+                index.search, query, 0, depth, filters)
+            buckets = (await run_in_threadpool(index.facets, query, filters)
+                       if facets else None)
+        else:
+            _, _, docs, _, buckets = await _atlas_search(
+                collection, query, skip=0, limit=depth, count_mode=count_mode,
+                fields=fields, highlight=highlight, facets=facets,
+                filters=filters)
+        return docs, buckets
+
+    async def vector_leg():
+        deadline = time.perf_counter() + config.HYBRID_VECTOR_BUDGET_MS / 1000.0
+        index = await _vector_index()
+        # wait_for abandons the await, not the thread: bound the embedding
+        # request itself by what is left of the budget
+        remaining = max(deadline - time.perf_counter(), 0.01)
+        hits = await run_in_threadpool(index.search_text, query, depth, remaining)
+        if filters and hits:
+            allowed = {
+                str(doc["_id"]) async for doc in collection.find(
+                    {"_id": {"$in": [ObjectId(i) for i, _ in hits]},
+                     **_mongo_filter(filters)},
+                    {"_id": 1},
+                )
             }
-        }
+            hits = [(i, score) for i, score in hits if i in allowed]
+        return hits
+
+    timings: dict = {}
+    dropped: list = []
+    lexical, vector_hits = await asyncio.gather(
+        _run_leg("lexical", config.HYBRID_LEXICAL_BUDGET_MS,
+                 lexical_leg(), timings, dropped),
+        _run_leg("vector", config.HYBRID_VECTOR_BUDGET_MS,
+                 vector_leg(), timings, dropped),
+    )
+    if lexical is None and vector_hits is None:
+        raise HTTPException(status_code=504, detail="Search timed out")
+    lexical_docs, buckets = lexical if lexical is not None else (None, None)
+
+    rankings = []
+    if lexical_docs is not None:
+        rankings.append([doc["id"] for doc in lexical_docs])
+    if vector_hits is not None:
+        rankings.append([hack_id for hack_id, _ in vector_hits])
+    fused = _rrf(rankings, config.HYBRID_RRF_K)
+    page_ids = fused[skip:skip + limit]
+
+    # Lexical hits already carry their fields; fetch vector-only ones
+    docs_by_id = {doc["id"]: doc for doc in lexical_docs or []}
+    missing = [ObjectId(i) for i, _ in page_ids if i not in docs_by_id]
+    if missing:
+        projection = {field: 1 for field in fields}
+        if highlight:
+            projection.update({path: 1 for path in snippets.SNIPPET_PATHS})
+        async for doc in collection.find({"_id": {"$in": missing}}, projection):
+            docs_by_id[str(doc["_id"])] = doc
+
+    hits = [
+        _to_hit({**docs_by_id[hack_id], "score": score}, fields, query, highlight)
+        for hack_id, score in page_ids if hack_id in docs_by_id
     ]
+    return len(fused), hits, timings, dropped, buckets
 
-    meta_docs = list(collection.aggregate(count_pipeline))
-    if meta_docs and "count" in meta_docs[0]:
-        total = meta_docs[0]["count"]["total"]
+
+async def _search_page(db, query: str, page: int, page_size: int,
+                       count_mode: str, state: dict, mode: str,
+                       fields: Sequence[str], highlight: bool,
+                       facets: bool = False,
+                       filters: Optional[dict] = None) -> dict:
+    """
+    One page of search_hacks results as a response dict. next_cursor
+    is bound to the (normalized) query that ran and the mode.
+    """
+    page = state.get("p", page)
+    skip = (page - 1) * page_size
+    is_lower_bound = False
+    next_state = None
+    buckets = None
+    extra = {}
+    if mode == "hybrid":
+        skip = state.get("o", skip)
+        total, hits, timings, dropped, buckets = await _hybrid_search(
+            db, query, skip=skip, limit=page_size, count_mode=count_mode,
+            fields=fields, highlight=highlight, facets=facets,
+            filters=filters)
+        if skip + len(hits) < total:
+            next_state = {"o": skip + len(hits)}
+        extra = {"timings_ms": timings, "dropped_legs": dropped}
+    elif config.SEARCH_BACKEND == "local":
+        # The in-memory index pages by offset at no extra cost
+        skip = state.get("o", skip)
+        # Scoring and facet counting are CPU-bound: keep them off the loop
+        index = local_search.get_index()
+        total, hit_docs = await run_in_threadpool(
+            index.search, query, skip=skip, limit=page_size, filters=filters)
+        hits = [_to_hit(doc, fields, query, highlight) for doc in hit_docs]
+        if skip + len(hits) < total:
+            next_state = {"o": skip + len(hits)}
+        if facets:
+            buckets = await run_in_threadpool(index.facets, query, filters)
     else:
-        total = 0
+        total, is_lower_bound, hit_docs, last_token, buckets = await _atlas_search(
+            db["hacks_all"], query, skip=skip, limit=page_size,
+            count_mode=count_mode, search_after=state.get("t"),
+            fields=fields, highlight=highlight, facets=facets,
+            filters=filters)
+        hits = [_to_hit(doc, fields, query, highlight) for doc in hit_docs]
+        if len(hits) == page_size:
+            next_state = {"t": last_token}
 
-    total_pages = math.ceil(total / page_size) if total > 0 else 0
+    return {
+        "total": total,
+        "total_is_lower_bound": is_lower_bound,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": math.ceil(total / page_size) if total > 0 else 0,
+        "hits": hits,
+        "next_cursor": encode_cursor({
+            **next_state, "p": page + 1, "q": normalize_query(query), "m": mode,
+        }) if next_state else None,
+        "facets": buckets,
+        **extra,
+    }
 
-    return SearchResult(
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages,
-        hits=hits,
-    )
+
+@router.get("/", response_model=SearchSummaryResult)
+async def search_hacks(
+    query: str = Query(..., description="Search term"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=50),
+    count: Optional[str] = Query(
+        None,
+        pattern="^(total|lowerBound)$",
+        description="Count mode; lowerBound stops counting at SEARCH_COUNT_THRESHOLD",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page; overrides page"),
+    mode: str = Query(
+        "lexical",
+        pattern="^(lexical|hybrid)$",
+        description="hybrid: fuse text and embedding results with reciprocal rank fusion",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated hit fields to return (default: all), e.g. title,excerpt,url,image_url",
+    ),
+    highlight: bool = Query(
+        False,
+        description="Add query-relevant title/content passages with match offsets to each hit",
+    ),
+    autocorrect: bool = Query(
+        False,
+        description="When the query finds few hits, run the spelling-corrected query instead",
+    ),
+    facets: bool = Query(
+        False,
+        description="Add source/categories/year facet buckets over all matches",
+    ),
+    source: Optional[str] = Query(None, description="Only hacks from this source"),
+    category: Optional[str] = Query(None, description="Only hacks in this category"),
+    date_from: Optional[date] = Query(None, description="Only hacks dated on or after (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Only hacks dated on or before (YYYY-MM-DD)"),
+    db=Depends(mongo.get_async_db),
+):
+    """
+    Search API to query the hacks_all collection.
+    Served by MongoDB Atlas Search, or by the in-process BM25 index
+    when SEARCH_BACKEND=local.
+    Deep pages should follow next_cursor (Atlas searchAfter) instead
+    of increasing page, which makes Atlas produce and drop every
+    earlier hit.
+    With mode=hybrid the text query and a vector query run concurrently
+    and are fused with RRF before paging; per-leg times are returned
+    in timings_ms and legs that missed their budget in dropped_legs.
+
+    Hits are built as plain dicts and serialized once with orjson
+    (no per-hit pydantic validation); the encoded body is what gets
+    cached. `fields` is pushed down into the $project stage.
+    With highlight=true each hit carries bounded `snippets`, so list
+    views can leave `content` out of `fields`.
+
+    When a first page has fewer than SPELLING_MIN_HITS hits the query is
+    spell-checked against the corpus vocabulary: the correction comes
+    back as did_you_mean, or with autocorrect=true is run in the same
+    request and reported as corrected_query (page on with that query).
+
+    facets=true adds source/categories/year buckets over the whole
+    match set, read from $$SEARCH_META of the same $search (Atlas) or
+    counted by the local index.
+
+    source, category and date_from/date_to restrict matches through
+    compound.filter (inside the index, no effect on scores); facet
+    counts are over the filtered matches.
+    """
+    query_logger.record("search", {
+        "query": query, "page": page, "page_size": page_size, "count": count,
+        "cursor": cursor, "mode": mode, "fields": fields, "highlight": highlight,
+        "autocorrect": autocorrect, "facets": facets, "source": source,
+        "category": category, "date_from": date_from, "date_to": date_to,
+    })
+    count_mode = count or config.SEARCH_COUNT_MODE
+    state = _parse_cursor(cursor, q=normalize_query(query), m=mode)
+    hit_fields = _parse_fields(fields)
+    filters = _parse_filters(source, category, date_from, date_to)
+
+    cache_key = ("search", normalize_query(query), page, page_size,
+                 count_mode, cursor, mode, hit_fields, highlight, autocorrect,
+                 facets, tuple(sorted(filters.items())))
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return _json_response(cached)
+
+    async def run(q: str) -> dict:
+        return await _search_page(
+            db, q, page=page, page_size=page_size, count_mode=count_mode,
+            state=state, mode=mode, fields=hit_fields, highlight=highlight,
+            facets=facets, filters=filters)
+
+    result = await run(query)
+
+    # Few hits on a first page: look for a misspelling
+    if result["total"] < config.SPELLING_MIN_HITS and cursor is None and page == 1:
+        index = spelling.current_index()
+        corrected = index.correct(query) if index is not None else None
+        if corrected and autocorrect:
+            retry = await run(corrected)
+            if retry["total"] > result["total"]:
+                result = {**retry, "corrected_query": corrected}
+        elif corrected:
+            result["did_you_mean"] = corrected
+
+    body = orjson.dumps(result)
+
+    # Don't pin a degraded hybrid answer in the cache
+    if not result.get("dropped_legs"):
+        response_cache.set(cache_key, body)
+    return _json_response(body)
+
+
+async def _ndjson(docs, fields: Sequence[str]):
+    """Encode docs as NDJSON, one chunk per EXPORT_BATCH_SIZE lines."""
+    lines = []
+    async for doc in docs:
+        lines.append(orjson.dumps(mongo_doc_to_hit(doc, fields)))
+        if len(lines) >= config.EXPORT_BATCH_SIZE:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+@router.get("/export")
+async def export_hacks(
+    query: Optional[str] = Query(
+        None, description="Search term; omit to export the whole collection"),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated hit fields to include (default: all)"),
+    source: Optional[str] = Query(None, description="Only hacks from this source"),
+    category: Optional[str] = Query(None, description="Only hacks in this category"),
+    date_from: Optional[date] = Query(None, description="Only hacks dated on or after (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Only hacks dated on or before (YYYY-MM-DD)"),
+    db=Depends(mongo.get_async_db),
+):
+    """
+    Stream every match of `query` (best first), or all of hacks_all
+    (by _id), as NDJSON: one hit per line, same shape as /api/search/ hits.
+
+    Backed by a server-side cursor read EXPORT_BATCH_SIZE documents at
+    a time; the next batch is only fetched once the previous chunk has
+    been sent, so memory stays flat however large the export is and a
+    slow client slows the cursor down instead of buffering.
+    """
+    hit_fields = _parse_fields(fields)
+    filters = _parse_filters(source, category, date_from, date_to)
+    collection = db["hacks_all"]
+    projection = {field: 1 for field in hit_fields}
+
+    if not query:
+        docs = collection.find(_mongo_filter(filters), projection) \
+            .sort("_id", 1).batch_size(config.EXPORT_BATCH_SIZE)
+    elif config.SEARCH_BACKEND == "local":
+        # The whole index is in memory already; only the hit list is new
+        index = local_search.get_index()
+        _, hits = await run_in_threadpool(
+            index.search, query, 0, len(index), filters)
+        docs = _iterate(hits)
+    else:
+        docs = collection.aggregate([
+            {"$search": _search_options(query, None, False, filters)},
+            {"$project": {**projection, "score": {"$meta": "searchScore"}}},
+        ], batchSize=config.EXPORT_BATCH_SIZE)
+
+    return StreamingResponse(
+        _ndjson(docs, hit_fields), media_type="application/x-ndjson")
+
+
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest_completions(
+    query: str = Query(..., min_length=1, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=suggest.MAX_SUGGESTIONS),
+):
+    """
+    Typeahead completions from titles, tags, categories and IKEA product
+    names. Served from the in-memory prefix index; no Mongo query per
+    keystroke.
+    """
+    index = suggest.current_index()
+    if index is None:
+        index = await run_in_threadpool(suggest.get_index)
+    return index.suggest(query, limit=limit)
+
+
+@router.get("/semantic", response_model=List[Hack])
+async def semantic_search(
+    query: str = Query(..., description="Search term"),
+    limit: int = Query(10, ge=1, le=50),
+    db=Depends(mongo.get_async_db),
+):
+    """
+    Semantic search: embeds the query and returns the nearest hacks in
+    the embedding matrix (python -m app.similarity.cli embed).
+    """
+    index = await _vector_index()
+    scored = await run_in_threadpool(index.search_text, query, limit)
+    return await _hacks_by_ids(db["hacks_all"], scored)
 
 
 @router.get("/similar/{hack_id}", response_model=List[Hack])
-def get_similar_hacks(
+async def get_similar_hacks(
     hack_id: str,
     limit: int = Query(6, ge=1, le=20),
-    db=Depends(mongo.get_db),
+    mode: str = Query(
+        "lexical",
+        pattern="^(lexical|semantic)$",
+        description="lexical: moreLikeThis neighbours; semantic: embedding neighbours",
+    ),
+    db=Depends(mongo.get_async_db),
 ):
+    """
+    Hacks similar to hack_id.
+    Lexical mode is served from the precomputed hack_neighbours table
+    (python -m app.similarity.cli neighbours) in one round trip; hacks
+    without an entry yet fall back to a live Atlas moreLikeThis query.
+    Semantic mode uses the nearest vectors in the embedding matrix.
+    """
+    query_logger.record("similar", {"hack_id": hack_id, "limit": limit, "mode": mode})
     collection = db["hacks_all"]
     index_name = mongo.MONGO_SEARCH_INDEX
 
-    # ---------- 1) Validate and fetch the reference document ---------
     try:
         obj_id = ObjectId(hack_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid hack_id")
 
-    ref_doc = collection.find_one({"_id": obj_id})
+    if mode == "semantic":
+        index = await _vector_index()
+        scored = await run_in_threadpool(index.similar_to, hack_id, limit)
+        if scored is None:
+            raise HTTPException(status_code=404, detail="Hack not found")
+        return await _hacks_by_ids(collection, scored)
+
+    # ---------- 0) Precomputed neighbour list + $lookup of the hacks ------
+    entries = await db[neighbours.NEIGHBOURS_COLLECTION].aggregate([
+        {"$match": {"_id": obj_id}},
+        {"$project": {"neighbours": {"$slice": ["$neighbours", limit]}}},
+        {
+            "$lookup": {
+                "from": "hacks_all",
+                "localField": "neighbours._id",
+                "foreignField": "_id",
+                "as": "docs",
+            }
+        },
+    ]).to_list(length=1)
+    if entries:
+        docs_by_id = {doc["_id"]: doc for doc in entries[0]["docs"]}
+        similar = []
+        for n in entries[0]["neighbours"]:
+            doc = docs_by_id.get(n["_id"])
+            if doc is not None:
+                similar.append(mongo_doc_to_hack({**doc, "score": n["score"]}))
+        return similar
+
+    # ---------- 1) Fetch the reference document ---------
+    ref_doc = await collection.find_one({"_id": obj_id})
     if not ref_doc:
         raise HTTPException(status_code=404, detail="Hack not found")
 
@@ -173,50 +779,63 @@ def get_similar_hacks(
         {"$limit": limit},
     ]
 
-    docs = list(collection.aggregate(pipeline))
+    docs = await collection.aggregate(pipeline).to_list(length=None)
     return [mongo_doc_to_hack(doc) for doc in docs]
 
 
 @router.get("/categories/top", response_model=List[dict])
-def get_top_categories(
+async def get_top_categories(
     limit: int = Query(6, ge=1, le=20),
-    db=Depends(mongo.get_db),
+    db=Depends(mongo.get_async_db),
 ):
     """
     Get the top categories by frequency from the hacks_all collection.
     Returns a list of categories with their counts, sorted by count descending.
+    Reads the materialized category_stats collection (one document per
+    category) instead of unwinding hacks_all.
     """
-    collection = db["hacks_all"]
+    cache_key = ("categories_top", limit)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    pipeline = [
-        # Unwind the categories array to create a document for each category
-        {"$unwind": "$categories"},
-        # Group by each category and count occurrences
-        {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
-        # Sort categories by count in descending order
-        {"$sort": {"count": -1}},
-        # Limit the result to the specified number
-        {"$limit": limit},
-        # Project to clean up the output
-        {"$project": {"category": "$_id", "count": 1, "_id": 0}}
+    stats = db[category_stats.CATEGORY_STATS_COLLECTION]
+    cursor = stats.find().sort("count", -1).limit(limit)
+    results = [
+        {"category": doc["_id"], "count": doc["count"]}
+        async for doc in cursor
     ]
-
-    results = list(collection.aggregate(pipeline))
+    response_cache.set(cache_key, results)
     return results
 
 
 @router.get("/categories/{category_name}/hacks", response_model=SearchResult)
-def get_hacks_by_category(
+async def get_hacks_by_category(
     category_name: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=50),
-    db=Depends(mongo.get_db),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page; overrides page"),
+    db=Depends(mongo.get_async_db),
 ):
     """
     Get all hacks that belong to a specific category.
-    Returns paginated results with total count.
+    Returns paginated results with total count, ordered by _id so
+    next_cursor can continue with an indexed _id range instead of skip().
     """
+    query_logger.record("category", {
+        "category_name": category_name, "page": page, "page_size": page_size,
+        "cursor": cursor,
+    })
+    state = _parse_cursor(cursor, c=category_name)
+
+    cache_key = ("category", category_name, page, page_size, cursor)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     collection = db["hacks_all"]
+    page = state.get("p", page)
 
     # Calculate pagination
     skip = (page - 1) * page_size
@@ -224,24 +843,169 @@ def get_hacks_by_category(
     # Query to find hacks with the specific category
     query = {"categories": category_name}
 
-    # Get the hacks for current page
-    cursor = collection.find(query).skip(skip).limit(page_size)
-    hit_docs = list(cursor)
+    page_query = query
+    if "id" in state:
+        page_query = {**query, "_id": {"$gt": ObjectId(state["id"])}}
+        skip = 0
+
+    # Get the hacks for current page and the total count concurrently;
+    # the count comes from category_stats, not a count_documents scan
+    find_cursor = (
+        collection.find(page_query).sort("_id", 1).skip(skip).limit(page_size)
+    )
+    hit_docs, stats_doc = await asyncio.gather(
+        find_cursor.to_list(length=page_size),
+        db[category_stats.CATEGORY_STATS_COLLECTION].find_one(
+            {"_id": category_name}),
+    )
+    total = stats_doc["count"] if stats_doc else 0
     hits: List[Hack] = [mongo_doc_to_hack(doc) for doc in hit_docs]
 
-    # Get total count
-    total = collection.count_documents(query)
     total_pages = math.ceil(total / page_size) if total > 0 else 0
 
-    return SearchResult(
+    next_cursor = None
+    if len(hit_docs) == page_size:
+        next_cursor = encode_cursor(
+            {"id": str(hit_docs[-1]["_id"]), "p": page + 1, "c": category_name})
+
+    result = SearchResult(
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages,
         hits=hits,
+        next_cursor=next_cursor,
     )
+    response_cache.set(cache_key, result)
+    return result
+
+
+def _params_model(route) -> type:
+    """Pydantic model of a route's query/path parameters (Query constraints included)."""
+    fields = {}
+    for name, param in inspect.signature(route).parameters.items():
+        if name == "db":
+            continue
+        default = param.default
+        if default is inspect.Parameter.empty:
+            default = ...
+        fields[name] = (param.annotation, default)
+    return create_model(f"{route.__name__}_params", **fields)
+
+
+# Sub-request types of /batch -> (route, params model)
+_BATCH_ROUTES = {
+    name: (route, _params_model(route))
+    for name, route in (
+        ("search", search_hacks),
+        ("category", get_hacks_by_category),
+        ("similar", get_similar_hacks),
+        ("top_categories", get_top_categories),
+    )
+}
+
+
+async def _run_sub_request(sub: BatchSubRequest, db) -> dict:
+    """Run one /batch sub-request through its route; errors become a status."""
+    route, params_model = _BATCH_ROUTES[sub.type]
+    try:
+        params = params_model.model_validate(sub.params)
+        result = await route(**dict(params), db=db)
+    except ValidationError as e:
+        return {"status": 422, "error": e.errors(include_url=False, include_context=False)}
+    except HTTPException as e:
+        return {"status": e.status_code, "error": e.detail}
+    except Exception as e:
+        logger.exception("%s sub-request failed: %s", sub.type, e)
+        return {"status": 500, "error": "Internal error"}
+
+    if isinstance(result, Response):
+        data = orjson.loads(result.body)
+    else:
+        data = jsonable_encoder(result)
+    return {"status": 200, "data": data}
+
+
+async def warm_up(entries: List[dict], db=None) -> None:
+    """
+    Replay logged requests (query_log.top_queries) through their routes
+    before the app serves traffic: opens pool connections, pages in the
+    search index and fills the response cache. Bounded by
+    WARMUP_CONCURRENCY and WARMUP_TIMEOUT_SECONDS; failures are counted,
+    not raised.
+    """
+    if not entries:
+        return
+    db = db if db is not None else mongo.get_async_db()
+    gate = asyncio.Semaphore(config.WARMUP_CONCURRENCY)
+    statuses: List[int] = []
+
+    async def replay(entry: dict) -> None:
+        async with gate:
+            sub = BatchSubRequest(type=entry["type"], params=entry.get("params") or {})
+            statuses.append((await _run_sub_request(sub, db))["status"])
+
+    start = time.perf_counter()
+    with query_logger.paused():
+        tasks = [asyncio.create_task(replay(e)) for e in entries]
+        _, pending = await asyncio.wait(tasks, timeout=config.WARMUP_TIMEOUT_SECONDS)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+    ok = sum(1 for s in statuses if s == 200)
+    logger.info("Warm-up replayed %d/%d logged requests (%d ok) in %.1fs",
+                len(statuses), len(entries), ok, time.perf_counter() - start)
+
+
+@router.post("/batch")
+async def batch_search(batch: BatchRequest, db=Depends(mongo.get_async_db)):
+    """
+    Run several search/category/similar/top_categories sub-requests in
+    one round trip. They run concurrently (bounded by the Mongo pool)
+    under one shared deadline; a sub-request still running at the
+    deadline is cancelled and reported with status 504, the others are
+    returned as usual. Sub-request params are the query/path parameters
+    of the corresponding GET route.
+    """
+    if len(batch.requests) > config.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.BATCH_MAX_REQUESTS} sub-requests per batch",
+        )
+    timeout_ms = config.BATCH_TIMEOUT_MS
+    if batch.timeout_ms is not None:
+        timeout_ms = max(0, min(batch.timeout_ms, timeout_ms))
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(_run_sub_request(sub, db)) for sub in batch.requests]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout_ms / 1000.0)
+        for task in pending:
+            task.cancel()
+
+    results = []
+    for sub, task in zip(batch.requests, tasks):
+        if task.done() and not task.cancelled():
+            outcome = task.result()
+        else:
+            outcome = {"status": 504, "error": "Deadline exceeded"}
+        results.append({"id": sub.id, "type": sub.type, **outcome})
+
+    return _json_response(orjson.dumps({
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000.0, 2),
+    }))
+
+
+@router.get("/cache/stats", response_model=dict)
+async def get_cache_stats():
+    """Hit/miss counters of the response cache, for sizing it."""
+    return response_cache.stats()
 
 
 # Search Index:
+# (source and categories also need "token" for the stringFacet buckets
+# of facets=true; stringFacet works too on older clusters)
 
-# { "mappings": { "dynamic": false, "fields": { "title": { "type": "string", "analyzer": "lucene.english" }, "content": { "type": "string", "analyzer": "lucene.english" }, "excerpt": { "type": "string", "analyzer": "lucene.english" }, "author": { "type": "string" }, "url": { "type": "string" }, "source": { "type": "string" }, "categories": { "type": "string" }, "tags": { "type": "string" }, "image_url": { "type": "string" }, "date": { "type": "date" } } } }
+# { "mappings": { "dynamic": false, "fields": { "title": { "type": "string", "analyzer": "lucene.english" }, "content": { "type": "string", "analyzer": "lucene.english" }, "excerpt": { "type": "string", "analyzer": "lucene.english" }, "author": { "type": "string" }, "url": { "type": "string" }, "source": [ { "type": "string" }, { "type": "token" } ], "categories": [ { "type": "string" }, { "type": "token" } ], "tags": { "type": "string" }, "image_url": { "type": "string" }, "date": { "type": "date" } } } }
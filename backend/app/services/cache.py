@@ -0,0 +1,113 @@
+# app/services/cache.py
+"""
+In-process LRU + TTL cache for search router responses.
+
+Entries are dropped when they expire, when the cache is full (least
+recently used first) or when the hacks_all generation changes.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app.core import config
+from app.services import corpus
+
+_MISSING = object()
+
+
+def _kind(key: Hashable) -> str:
+    return str(key[0]) if isinstance(key, tuple) and key else "other"
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, for cache keys."""
+    return " ".join(query.lower().split())
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        # Per cache-key kind (first element of tuple keys, e.g. "search")
+        self.hits_by_kind: Counter = Counter()
+        self.misses_by_kind: Counter = Counter()
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _check_generation(self, generation: int) -> None:
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+
+        generation = corpus.current_generation()
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                if entry is not _MISSING:
+                    del self._entries[key]
+                self.misses += 1
+                self.misses_by_kind[_kind(key)] += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.hits_by_kind[_kind(key)] += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        generation = corpus.current_generation()
+        with self._lock:
+            self._check_generation(generation)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "hits_by_kind": dict(self.hits_by_kind),
+            "misses_by_kind": dict(self.misses_by_kind),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+)
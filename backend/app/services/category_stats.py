@@ -0,0 +1,91 @@
+# app/services/category_stats.py
+"""
+Materialized per-category document counts for hacks_all.
+
+category_stats holds one document per category: {_id: <category>, count: <n>}.
+It is rebuilt from scratch by build_hacks_all.py (and on API startup when
+it is missing) and kept up to date incrementally by the tokenization
+pipeline, so the API never has to $unwind the whole collection.
+"""
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from app.services import mongo
+
+CATEGORY_STATS_COLLECTION = "category_stats"
+
+STATS_INDEX = [("count", -1)]  # top categories: sorted read of the counts
+
+
+# Counts documents per category (a category listed twice in one
+# document counts once, like count_documents({"categories": c}))
+COUNT_PIPELINE = [
+    {"$project": {"categories": {"$setUnion": [
+        {"$ifNull": ["$categories", []]}, []]}}},
+    {"$unwind": "$categories"},
+    {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
+]
+
+
+def rebuild(db=None) -> None:
+    """
+    Recompute category_stats from hacks_all (blocking client). The rows
+    are replaced in place rather than with $out, which would drop the
+    collection's index; there is one row per category, so a few hundred
+    writes at most.
+    """
+    db = db if db is not None else mongo.get_db()
+    stats = db[CATEGORY_STATS_COLLECTION]
+    rows = list(db["hacks_all"].aggregate(COUNT_PIPELINE))
+    for row in rows:
+        stats.replace_one({"_id": row["_id"]}, row, upsert=True)
+    stats.delete_many({"_id": {"$nin": [row["_id"] for row in rows]}})
+    stats.create_index(STATS_INDEX)
+
+
+async def ensure_built(db=None) -> None:
+    """Build category_stats on the async client if it does not exist yet."""
+    db = db if db is not None else mongo.get_async_db()
+    stats = db[CATEGORY_STATS_COLLECTION]
+    if await stats.estimated_document_count():
+        return
+    if not await db["hacks_all"].estimated_document_count():
+        return
+    print("[category_stats] Building category_stats from hacks_all...")
+    rows = await db["hacks_all"].aggregate(COUNT_PIPELINE).to_list(length=None)
+    for row in rows:
+        # Upserts: several workers may build it at the same startup
+        await stats.replace_one({"_id": row["_id"]}, row, upsert=True)
+    await stats.create_index(STATS_INDEX)
+
+
+def category_delta(
+    old_categories: Optional[Iterable[str]],
+    new_categories: Optional[Iterable[str]],
+) -> Counter:
+    """Per-category count change when a document's categories are replaced."""
+    old = set(old_categories or [])
+    new = set(new_categories or [])
+    delta: Counter = Counter()
+    for c in new - old:
+        delta[c] += 1
+    for c in old - new:
+        delta[c] -= 1
+    return delta
+
+
+def apply_delta(delta: Counter, db=None) -> None:
+    """Apply accumulated count changes to category_stats in one bulk write."""
+    ops: List[UpdateOne] = [
+        UpdateOne({"_id": c}, {"$inc": {"count": n}}, upsert=True)
+        for c, n in delta.items() if n
+    ]
+    if not ops:
+        return
+
+    db = db if db is not None else mongo.get_db()
+    stats = db[CATEGORY_STATS_COLLECTION]
+    stats.bulk_write(ops, ordered=False)
+    stats.delete_many({"count": {"$lte": 0}})
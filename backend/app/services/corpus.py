@@ -0,0 +1,124 @@
+# app/services/corpus.py
+"""
+Generation counter for the hacks_all collection.
+
+Every job that rewrites hacks_all (crawler/scraper/build_hacks_all.py,
+the tokenization pipeline) bumps the counter, and in-process caches
+compare it against the generation they were filled at. IndexSnapshot
+holds the in-memory indexes built from hacks_all (local_search, suggest,
+spelling) and rebuilds them when the generation moves on.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from app.core import config
+from app.services import mongo
+
+CORPUS_META_COLLECTION = "corpus_meta"
+CORPUS_META_ID = "hacks_all"
+
+_generation = 0
+
+
+def bump_generation(db=None) -> int:
+    """Increment the hacks_all generation and return the new value."""
+    coll = (db if db is not None else mongo.get_db())[CORPUS_META_COLLECTION]
+    doc = coll.find_one_and_update(
+        {"_id": CORPUS_META_ID},
+        {"$inc": {"generation": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["generation"]
+
+
+def current_generation() -> int:
+    """Last generation seen by watch_generation() (no I/O)."""
+    return _generation
+
+
+async def refresh_generation() -> int:
+    """Re-read the hacks_all generation from Mongo."""
+    global _generation
+
+    doc = await mongo.get_async_collection(CORPUS_META_COLLECTION).find_one(
+        {"_id": CORPUS_META_ID})
+    _generation = doc["generation"] if doc else 0
+    return _generation
+
+
+async def watch_generation() -> None:
+    """Poll the generation every CORPUS_GENERATION_POLL_SECONDS, forever."""
+    while True:
+        await asyncio.sleep(config.CORPUS_GENERATION_POLL_SECONDS)
+        try:
+            await refresh_generation()
+        except Exception as e:
+            print(f"[corpus] Failed to read hacks_all generation: {e}")
+
+
+T = TypeVar("T")
+
+
+class IndexSnapshot(Generic[T]):
+    """
+    A process-wide index built from hacks_all by `build`, together with
+    the generation it was built at. get() builds it on first use;
+    keep_fresh() rebuilds it in the background once the generation moves
+    on, the old index serving until the new one is swapped in, and then
+    calls `on_rebuild`. `name` and `unit` only label the log lines.
+    """
+
+    def __init__(self, name: str, unit: str, build: Callable[[], T],
+                 on_rebuild: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.unit = unit
+        self._build_index = build
+        self._on_rebuild = on_rebuild
+        self._index: Optional[T] = None
+        self._generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> None:
+        generation = current_generation()
+        start = time.perf_counter()
+        index = self._build_index()
+        self._index, self._generation = index, generation
+        print(f"[{self.name}] Indexed {len(index)} {self.unit} "
+              f"in {time.perf_counter() - start:.2f}s (generation {generation})")
+
+    def rebuild(self) -> None:
+        """Build a fresh index from hacks_all and swap it in."""
+        with self._lock:
+            self._build()
+
+    def current(self) -> Optional[T]:
+        """The index being served, or None before the first build (no I/O)."""
+        return self._index
+
+    def get(self) -> T:
+        """Return the current index, building it on first use."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._build()
+        return self._index
+
+    async def keep_fresh(self) -> None:
+        """Rebuild the index in the background when hacks_all changes."""
+        while True:
+            await asyncio.sleep(config.CORPUS_GENERATION_POLL_SECONDS)
+            if self._index is None or self._generation == current_generation():
+                continue
+            try:
+                await run_in_threadpool(self.rebuild)
+            except Exception as e:
+                print(f"[{self.name}] Rebuild failed: {e}")
+                continue
+            if self._on_rebuild is not None:
+                self._on_rebuild()
@@ -0,0 +1,86 @@
+# app/services/facets.py
+"""
+Facet buckets for /api/search/ (?facets=true): source, categories and
+year of `date`.
+
+With Atlas the buckets come from the `facet` collector, read from
+$$SEARCH_META on the same $search that returns the hits. The local
+backend counts them over the full match set of the in-process index.
+Both produce
+    {"source": [{"value": "reddit", "count": 12}, ...],
+     "categories": [...], "year": [{"value": "2021", "count": 3}, ...]}
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+FACET_NAMES = ("source", "categories", "year")
+MAX_BUCKETS = 20
+FIRST_YEAR = 2005  # oldest year bucket for the Atlas date facet
+
+
+def _year_boundaries() -> List[datetime]:
+    last = datetime.now(timezone.utc).year + 1
+    return [datetime(y, 1, 1, tzinfo=timezone.utc)
+            for y in range(FIRST_YEAR, last + 1)]
+
+
+def atlas_facet_collector(operator: dict) -> dict:
+    """`facet` collector wrapping `operator` for $search / $searchMeta."""
+    return {
+        "operator": operator,
+        "facets": {
+            "source": {"type": "string", "path": "source",
+                       "numBuckets": MAX_BUCKETS},
+            "categories": {"type": "string", "path": "categories",
+                           "numBuckets": MAX_BUCKETS},
+            "year": {"type": "date", "path": "date",
+                     "boundaries": _year_boundaries(), "default": "other"},
+        },
+    }
+
+
+def _buckets(name: str, counts: Iterable) -> List[Dict[str, Any]]:
+    """Largest buckets first; years newest first."""
+    if name == "year":
+        ranked = sorted(counts, key=lambda vc: vc[0], reverse=True)
+    else:
+        ranked = sorted(counts, key=lambda vc: (-vc[1], vc[0]))[:MAX_BUCKETS]
+    return [{"value": v, "count": n} for v, n in ranked if n > 0]
+
+
+def read_atlas_facets(meta: Optional[dict]) -> Dict[str, List[Dict[str, Any]]]:
+    """Facet buckets from a SEARCH_META document."""
+    facet = (meta or {}).get("facet") or {}
+    out = {}
+    for name in FACET_NAMES:
+        raw = (facet.get(name) or {}).get("buckets") or []
+        if name == "year":
+            pairs = [(str(b["_id"].year), b["count"])
+                     for b in raw if isinstance(b.get("_id"), datetime)]
+        else:
+            pairs = [(str(b["_id"]), b["count"]) for b in raw]
+        out[name] = _buckets(name, pairs)
+    return out
+
+
+def _year(value: Any) -> Optional[str]:
+    if isinstance(value, datetime):
+        return str(value.year)
+    if isinstance(value, str) and value[:4].isdigit():
+        return value[:4]
+    return None
+
+
+def count_facets(docs: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Facet buckets over stored hit documents (local backend)."""
+    counts = {name: Counter() for name in FACET_NAMES}
+    for doc in docs:
+        if doc.get("source"):
+            counts["source"][doc["source"]] += 1
+        for category in set(doc.get("categories") or []):
+            counts["categories"][category] += 1
+        year = _year(doc.get("date"))
+        if year:
+            counts["year"][year] += 1
+    return {name: _buckets(name, c.items()) for name, c in counts.items()}
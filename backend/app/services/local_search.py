@@ -0,0 +1,416 @@
+# app/services/local_search.py
+"""
+In-process BM25 search over the hacks_all collection.
+
+Mirrors the Atlas query used by /api/search/:
+  - must:   fuzzy (maxEdits: 1) text match on title/content
+  - should: text match on categories/tags (only boosts the score)
+
+Posting lists are stored as parallel arrays (doc ids + precomputed,
+field-weighted BM25 impacts), so a query is a handful of array scans.
+
+The index is a snapshot of hacks_all: keep_fresh() rebuilds it in the
+background whenever the corpus generation changes.
+"""
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models import HIT_FIELDS
+from app.services import corpus, mongo
+from app.services.cache import response_cache
+from app.services.facets import count_facets
+
+# Field weights used when precomputing impacts
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "content": 1.0,
+    "categories": 2.0,
+    "tags": 1.5,
+}
+MUST_FIELDS = ("title", "content")
+SHOULD_FIELDS = ("categories", "tags")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Same default as Atlas fuzzy matching
+FUZZY_MAX_EXPANSIONS = 50
+_EXPANSION_CACHE_SIZE = 4096
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by for if in into is it no not of on or such that
+the their then there these they this to was will with
+""".split())
+
+
+def _stem(token: str) -> str:
+    """Minimal English plural stemmer (same rules as Lucene's EnglishMinimalStemmer)."""
+    n = len(token)
+    if n < 3 or token[-1] != "s":
+        return token
+    if token[-2] in ("u", "s"):
+        return token
+    if token[-2] == "e":
+        if n > 3 and token[-3] == "i" and token[-4] not in ("a", "e"):
+            return token[:-3] + "y"
+        if token[-3] in ("i", "a", "o", "e"):
+            return token
+    return token[:-1]
+
+
+def analyze(text: Optional[str]) -> List[str]:
+    """Lowercase, split on non-word characters, drop stopwords and stem plurals."""
+    if not text:
+        return []
+    return [
+        _stem(t) for t in _TOKEN_RE.findall(text.lower())
+        if t not in _STOPWORDS
+    ]
+
+
+def analyze_spans(text: Optional[str]) -> List[Tuple[str, int, int]]:
+    """Like analyze(), but keeps each term's character range in `text`."""
+    if not text:
+        return []
+    spans = []
+    for m in _TOKEN_RE.finditer(text):
+        token = m.group().lower()
+        if token not in _STOPWORDS:
+            spans.append((_stem(token), m.start(), m.end()))
+    return spans
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, list):
+        return " ".join(v for v in value if isinstance(v, str))
+    return value if isinstance(value, str) else ""
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insert/delete/substitute/transpose."""
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if i == la:
+        return True
+    if la == lb:
+        # substitution or adjacent transposition
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return (
+            i + 1 < la
+            and a[i] == b[i + 1]
+            and a[i + 1] == b[i]
+            and a[i + 2:] == b[i + 2:]
+        )
+    # one insertion into a
+    return a[i:] == b[i + 1:]
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    """Stored date as a naive UTC datetime (older documents hold ISO text)."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def matches_filters(doc: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """
+    Local equivalent of the Atlas compound.filter clause. Keys:
+    source, category, date_gte (inclusive), date_lt (exclusive);
+    dates are naive UTC datetimes.
+    """
+    if filters.get("source") and doc.get("source") != filters["source"]:
+        return False
+    if filters.get("category") and filters["category"] not in (doc.get("categories") or []):
+        return False
+    if filters.get("date_gte") or filters.get("date_lt"):
+        date = _as_datetime(doc.get("date"))
+        if date is None:
+            return False
+        if filters.get("date_gte") and date < filters["date_gte"]:
+            return False
+        if filters.get("date_lt") and date >= filters["date_lt"]:
+            return False
+    return True
+
+
+class LocalSearchIndex:
+    """Immutable inverted index over a snapshot of hacks_all."""
+
+    def __init__(self, docs: Iterable[Dict[str, Any]]):
+        self._docs: List[Dict[str, Any]] = []
+
+        field_postings: Dict[str, Dict[str, List[Tuple[int, int]]]] = {
+            f: defaultdict(list) for f in FIELD_WEIGHTS
+        }
+        field_lengths: Dict[str, List[int]] = {f: [] for f in FIELD_WEIGHTS}
+
+        for doc in docs:
+            doc_id = len(self._docs)
+            hit = {f: doc.get(f) for f in HIT_FIELDS}
+            hit["id"] = str(doc["_id"])
+            hit["categories"] = hit["categories"] or []
+            hit["tags"] = hit["tags"] or []
+            self._docs.append(hit)
+
+            for field in FIELD_WEIGHTS:
+                tokens = analyze(_field_text(doc.get(field)))
+                field_lengths[field].append(len(tokens))
+                for term, tf in Counter(tokens).items():
+                    field_postings[field][term].append((doc_id, tf))
+
+        self._must = self._build_impacts(
+            MUST_FIELDS, field_postings, field_lengths)
+        self._should = self._build_impacts(
+            SHOULD_FIELDS, field_postings, field_lengths)
+        self._alphabet = "".join(sorted({c for t in self._must for c in t}))
+        self._expansions: Dict[str, Tuple[Tuple[str, float], ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _build_impacts(
+        self,
+        fields: Tuple[str, ...],
+        field_postings: Dict[str, Dict[str, List[Tuple[int, int]]]],
+        field_lengths: Dict[str, List[int]],
+    ) -> Dict[str, Tuple[array, array]]:
+        """
+        Merge per-field BM25 scores into one posting list per term:
+        (sorted doc ids as array('I'), weighted impacts as array('f')).
+        """
+        n_docs = len(self._docs)
+        merged: Dict[str, Dict[int, float]] = defaultdict(dict)
+
+        for field in fields:
+            lengths = field_lengths[field]
+            avg_len = (sum(lengths) / n_docs) if n_docs else 0.0
+            weight = FIELD_WEIGHTS[field]
+
+            for term, postings in field_postings[field].items():
+                df = len(postings)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                scores = merged[term]
+                for doc_id, tf in postings:
+                    norm = 1.0 - BM25_B + BM25_B * lengths[doc_id] / avg_len
+                    bm25 = idf * tf * (BM25_K1 + 1.0) / (tf + BM25_K1 * norm)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * bm25
+
+        return {
+            term: (array("I", sorted(scores)),
+                   array("f", (scores[d] for d in sorted(scores))))
+            for term, scores in merged.items()
+        }
+
+    def _expand(self, term: str) -> Tuple[Tuple[str, float], ...]:
+        """
+        Terms within one edit of `term` (Damerau-Levenshtein), with a
+        boost that decays for short terms, like Lucene's fuzzy rewrite.
+        """
+        cached = self._expansions.get(term)
+        if cached is not None:
+            return cached
+
+        candidates = set()
+        if term in self._must:
+            candidates.add(term)
+
+        splits = [(term[:i], term[i:]) for i in range(len(term) + 1)]
+        for left, right in splits:
+            if right:
+                candidates.add(left + right[1:])
+                if len(right) > 1:
+                    candidates.add(left + right[1] + right[0] + right[2:])
+            for c in self._alphabet:
+                candidates.add(left + c + right)
+                if right:
+                    candidates.add(left + c + right[1:])
+
+        expanded = [
+            t for t in candidates
+            if t in self._must and _within_one_edit(term, t)
+        ]
+        # Keep the most frequent expansions, like Atlas' maxExpansions
+        expanded.sort(key=lambda t: (t != term, -len(self._must[t][0])))
+        expanded = expanded[:FUZZY_MAX_EXPANSIONS]
+
+        result = tuple(
+            (t, 1.0 if t == term else 1.0 - 1.0 / min(len(term), len(t)))
+            for t in expanded
+        )
+        if len(self._expansions) >= _EXPANSION_CACHE_SIZE:
+            self._expansions.clear()
+        self._expansions[term] = result
+        return result
+
+    def _match(self, query: str,
+               filters: Optional[Dict[str, Any]] = None) -> Dict[int, float]:
+        """Score of every document matching `query` and `filters`, by doc position."""
+        terms = list(dict.fromkeys(analyze(query)))
+        scores: Dict[int, float] = {}
+
+        for term in terms:
+            for expanded, boost in self._expand(term):
+                ids, impacts = self._must[expanded]
+                for doc_id, impact in zip(ids, impacts):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + boost * impact
+
+        if filters:
+            scores = {
+                doc_id: score for doc_id, score in scores.items()
+                if matches_filters(self._docs[doc_id], filters)
+            }
+        if not scores:
+            return scores
+
+        for term in terms:
+            postings = self._should.get(term)
+            if postings is None:
+                continue
+            for doc_id, impact in zip(*postings):
+                if doc_id in scores:
+                    scores[doc_id] += impact
+        return scores
+
+    def search(
+        self,
+        query: str,
+        skip: int = 0,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Run a ranked query, restricted to documents passing `filters`
+        (see matches_filters; they do not change scores).
+
+        Returns:
+            Tuple of (total matching documents, hits for [skip, skip + limit))
+            where each hit has the same keys as the Atlas $project plus score.
+        """
+        scores = self._match(query, filters)
+        if not scores:
+            return 0, []
+
+        top = heapq.nlargest(skip + limit, scores.items(),
+                             key=lambda item: item[1])
+        hits = [
+            {**self._docs[doc_id], "score": score}
+            for doc_id, score in top[skip:]
+        ]
+        return len(scores), hits
+
+    def facets(self, query: str,
+               filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Facet buckets over every document matching `query` and `filters`."""
+        return count_facets(
+            self._docs[doc_id] for doc_id in self._match(query, filters))
+
+    @property
+    def docs(self) -> List[Dict[str, Any]]:
+        """Stored hits, indexed by internal doc position."""
+        return self._docs
+
+    def _mlt_terms(self, doc_pos: int, max_query_terms: int) -> List[str]:
+        """The reference document's highest tf-idf terms (more_like_this)."""
+        doc = self._docs[doc_pos]
+        tf = Counter(analyze(" ".join(
+            _field_text(doc.get(f)) for f in FIELD_WEIGHTS)))
+
+        n_docs = len(self._docs)
+        weighted = []
+        for term, count in tf.items():
+            postings = self._must.get(term) or self._should.get(term)
+            if postings is None:
+                continue
+            weighted.append(
+                (count * math.log(1.0 + n_docs / len(postings[0])), term))
+        weighted.sort(reverse=True)
+        return [term for _, term in weighted[:max_query_terms]]
+
+    def more_like_this_scores(
+        self,
+        doc_pos: int,
+        targets: Iterable[int],
+        max_query_terms: int = 25,
+    ) -> Dict[int, float]:
+        """
+        Scores more_like_this(doc_pos) gives the documents in `targets`,
+        without scoring the rest of the collection.
+        """
+        targets = sorted(set(targets))
+        scores = dict.fromkeys(targets, 0.0)
+        for term in self._mlt_terms(doc_pos, max_query_terms):
+            for postings in (self._must.get(term), self._should.get(term)):
+                if postings is None:
+                    continue
+                ids, impacts = postings
+                for target in targets:
+                    i = bisect_left(ids, target)
+                    if i < len(ids) and ids[i] == target:
+                        scores[target] += impacts[i]
+        return scores
+
+    def more_like_this(
+        self,
+        doc_pos: int,
+        limit: int = 10,
+        max_query_terms: int = 25,
+    ) -> List[Tuple[int, float]]:
+        """
+        Documents most similar to the one at `doc_pos`, like Atlas
+        moreLikeThis: the reference document's highest tf-idf terms are
+        run as an exact (non-fuzzy) query over all fields.
+
+        Returns:
+            List of (doc position, score), best first, excluding doc_pos.
+        """
+        scores: Dict[int, float] = {}
+        for term in self._mlt_terms(doc_pos, max_query_terms):
+            for postings in (self._must.get(term), self._should.get(term)):
+                if postings is None:
+                    continue
+                for other, impact in zip(*postings):
+                    scores[other] = scores.get(other, 0.0) + impact
+        scores.pop(doc_pos, None)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    @classmethod
+    def from_collection(cls, collection) -> "LocalSearchIndex":
+        projection = {f: 1 for f in HIT_FIELDS}
+        return cls(collection.find({}, projection))
+
+
+# Responses cached while the old index was still serving the new
+# generation are stale too, hence the cache clear after a rebuild
+_snapshot: corpus.IndexSnapshot[LocalSearchIndex] = corpus.IndexSnapshot(
+    "local_search", "hacks",
+    lambda: LocalSearchIndex.from_collection(mongo.get_collection("hacks_all")),
+    on_rebuild=response_cache.clear)
+
+rebuild = _snapshot.rebuild
+current_index = _snapshot.current
+get_index = _snapshot.get
+keep_fresh = _snapshot.keep_fresh
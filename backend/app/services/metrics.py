@@ -0,0 +1,242 @@
+# app/services/metrics.py
+"""
+In-process request and Mongo metrics, exposed in Prometheus text format
+by GET /metrics (app/routers/metrics.py).
+
+- MetricsMiddleware: per-route latency and response size histograms,
+  in-flight request gauges
+- MongoCommandTimer: pymongo CommandListener timing every command,
+  tagged with the pipeline kind ($search, $searchMeta, moreLikeThis,
+  $unwind categories, ...)
+
+Recording is a couple of dict lookups and a bucket increment under a
+lock, so it is meant to stay on in production (METRICS_ENABLED=0 turns
+it off).
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.core import config
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Labels, value: float) -> None:
+        # [count per bucket..., +Inf count, sum]
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), series):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_fmt(labels + (('le', le),))} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_fmt(labels)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{_fmt(labels)} {cumulative:g}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self._values: Dict[Labels, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_fmt(labels)} {value:g}" for labels, value in items)
+        return lines
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render_counter(name: str, help_text: str, values: Dict[Labels, float]) -> List[str]:
+    """Counter lines for values owned elsewhere (e.g. the response cache)."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    lines.extend(f"{name}{_fmt(labels)} {value:g}" for labels, value in sorted(values.items()))
+    return lines
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Time to the last byte of the response, by route.", LATENCY_BUCKETS)
+response_size = Histogram(
+    "http_response_size_bytes", "Response body size, by route.", SIZE_BUCKETS)
+in_flight = Gauge(
+    "http_requests_in_flight", "Requests being processed, by route.")
+mongo_latency = Histogram(
+    "mongo_command_duration_seconds",
+    "Mongo command round trip as reported by the driver, by command and pipeline.",
+    LATENCY_BUCKETS)
+mongo_failures = Gauge(
+    "mongo_command_failures_total",
+    "Failed Mongo commands, by command and pipeline.", kind="counter")
+hybrid_dropped = Gauge(
+    "hybrid_legs_dropped_total",
+    "Hybrid search legs dropped, by leg and reason.", kind="counter")
+
+
+# ---------------------------------------------------------------- HTTP --
+
+def _route_template(app, scope) -> str:
+    """Path template of the route `scope` will hit ("/api/search/similar/{hack_id}")."""
+    from starlette.routing import Match
+
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (does not buffer streaming responses)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route_labels = (("method", scope["method"]),
+                        ("route", _route_template(scope["app"], scope)))
+        status = ["500"]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        in_flight.inc(route_labels)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.inc(route_labels, -1)
+            labels = route_labels + (("status", status[0]),)
+            request_latency.observe(labels, time.perf_counter() - start)
+            response_size.observe(route_labels, size[0])
+
+
+# --------------------------------------------------------------- Mongo --
+
+def pipeline_tag(command_name: str, command: Dict[str, Any]) -> str:
+    """Short label for what a command does, mostly by aggregation stage."""
+    if command_name != "aggregate":
+        return command_name
+    pipeline = command.get("pipeline") or []
+    first = pipeline[0] if pipeline else {}
+    if "$search" in first:
+        return "moreLikeThis" if "moreLikeThis" in first["$search"] else "$search"
+    if "$searchMeta" in first:
+        return "$searchMeta"
+    for stage in pipeline:
+        if stage.get("$unwind") in ("$categories", {"path": "$categories"}):
+            return "$unwind categories"
+    for stage in pipeline:
+        if "$lookup" in stage:
+            return "$lookup"
+    return "aggregate"
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Times every command on the clients it is registered with."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, Any], Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, event) -> Optional[Tuple[str, str, str]]:
+        with self._lock:
+            return self._pending.pop((event.request_id, event.connection_id), None)
+
+    def started(self, event) -> None:
+        if not config.METRICS_ENABLED:
+            return
+        command = event.command
+        collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = command.get("collection", "")
+        tag = pipeline_tag(event.command_name, command)
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = (
+                event.command_name, tag, str(collection))
+
+    def succeeded(self, event) -> None:
+        labels = self._labels(event)
+        if labels is not None:
+            mongo_latency.observe(_mongo_labels(labels), event.duration_micros / 1e6)
+
+    def failed(self, event) -> None:
+        labels = self._labels(event)
+        if labels is not None:
+            mongo_latency.observe(_mongo_labels(labels), event.duration_micros / 1e6)
+            mongo_failures.inc(_mongo_labels(labels))
+
+
+def _mongo_labels(labels: Tuple[str, str, str]) -> Labels:
+    command, tag, collection = labels
+    return (("command", command), ("pipeline", tag), ("collection", collection))
+
+
+mongo_command_timer = MongoCommandTimer()
+
+
+def render() -> List[str]:
+    lines: List[str] = []
+    for metric in (request_latency, response_size, in_flight,
+                   mongo_latency, mongo_failures, hybrid_dropped):
+        lines.extend(metric.render())
+    return lines
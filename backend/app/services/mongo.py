@@ -1,22 +1,64 @@
 # app/services/mongo.py (add at top)
 import os
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from app.services import metrics
+
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "text_retrived")
 MONGO_SEARCH_INDEX = os.getenv("MONGO_SEARCH_INDEX", "default") 
 
+# Connection pool of the async client used by the API routes.
+# Concurrent Mongo operations beyond MONGO_MAX_POOL_SIZE wait up to
+# MONGO_WAIT_QUEUE_TIMEOUT_MS for a free connection.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(
+    os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
 if not MONGO_URI:
     raise RuntimeError("MONGO_URI is not set. Add it to your .env file.")
 
-_client = MongoClient(MONGO_URI)
+# Blocking client: tokenization jobs and index builds
+_client = MongoClient(MONGO_URI, event_listeners=[metrics.mongo_command_timer])
 _db = _client[MONGO_DB_NAME]
 
+# Async client: request path
+_async_client = AsyncIOMotorClient(
+    MONGO_URI,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    event_listeners=[metrics.mongo_command_timer],
+)
+_async_db = _async_client[MONGO_DB_NAME]
+
 def get_db():
     return _db
 
 def get_collection(name: str):
     return _db[name]
+
+def get_async_db():
+    return _async_db
+
+def get_async_collection(name: str):
+    return _async_db[name]
+
+async def ensure_indexes() -> None:
+    """Create the secondary indexes the API routes rely on (idempotent)."""
+    hacks = _async_db["hacks_all"]
+    # Category browsing: equality on categories, keyset range on _id
+    await hacks.create_index([("categories", 1), ("_id", 1)])
+    # Top categories: sorted read of the materialized counts
+    await _async_db["category_stats"].create_index([("count", -1)])
+
+def close_clients() -> None:
+    _async_client.close()
+    _client.close()
@@ -0,0 +1,163 @@
+# app/services/query_log.py
+"""
+Sampled, append-only log of search, category and similar requests.
+
+Each line of QUERY_LOG_PATH is one request in the shape of a /batch
+sub-request,
+    {"ts": 1735689600.1, "type": "search", "params": {"query": "kallax", ...}}
+so a log can be replayed through the batch machinery (startup warm-up)
+or over HTTP (python -m bench.replay).
+
+The request path only samples and enqueues; a writer thread serializes
+and appends. When the queue is full entries are dropped, never waited
+on. The file is rotated to QUERY_LOG_PATH + ".1" past QUERY_LOG_MAX_BYTES.
+"""
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from app.core import config
+
+MAX_PENDING = 10000
+_STOP = object()
+
+
+class QueryLog:
+    def __init__(self, path: str, sample_rate: float, max_bytes: int):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=MAX_PENDING)
+        self._thread: Optional[threading.Thread] = None
+        self._paused = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and bool(self.path)
+
+    def record(self, kind: str, params: Dict[str, Any]) -> None:
+        """Sample one request; never blocks."""
+        if self._paused or not self.enabled or random.random() >= self.sample_rate:
+            return
+        entry = {
+            "ts": time.time(),
+            "type": kind,
+            "params": {k: v for k, v in params.items() if v is not None},
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    @contextmanager
+    def paused(self):
+        """Don't log requests made inside the block (e.g. warm-up replays)."""
+        self._paused = True
+        try:
+            yield
+        finally:
+            self._paused = False
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._write_loop, name="query-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush what is queued and stop the writer."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass  # writer is gone
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _write_loop(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            f = open(self.path, "ab")
+        except OSError as e:
+            # Entries then pile up in the queue and are dropped once it is full
+            print(f"[query_log] Cannot open {self.path}: {e}")
+            return
+        try:
+            while True:
+                batch = [self._queue.get()]
+                # Drain whatever else is waiting into the same write
+                while len(batch) < 1000:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(e is _STOP for e in batch)
+                lines = [orjson.dumps(e, option=orjson.OPT_APPEND_NEWLINE)
+                         for e in batch if e is not _STOP]
+                try:
+                    f.write(b"".join(lines))
+                    f.flush()
+                    if self.max_bytes and f.tell() >= self.max_bytes:
+                        f.close()
+                        os.replace(self.path, self.path + ".1")
+                        f = open(self.path, "ab")
+                except OSError as e:
+                    print(f"[query_log] Write failed: {e}")
+                if stop:
+                    return
+        finally:
+            f.close()
+
+
+def read_entries(path: str, window: int) -> List[Dict[str, Any]]:
+    """The last `window` entries of the log (rotated file first), oldest first."""
+    recent: deque = deque(maxlen=window)
+    for p in (path + ".1", path):
+        try:
+            with open(p, "rb") as f:
+                for line in f:
+                    try:
+                        recent.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        continue  # torn last line of a crashed writer
+        except FileNotFoundError:
+            continue
+    return list(recent)
+
+
+def top_queries(n: int, path: Optional[str] = None,
+                window: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    The n most frequent requests among the most recent `window` log
+    entries, as {"type", "params"} dicts, most frequent first.
+    """
+    entries = read_entries(path or config.QUERY_LOG_PATH,
+                           window or config.WARMUP_WINDOW)
+    counts: Counter = Counter()
+    requests: Dict[bytes, Dict[str, Any]] = {}
+    for e in entries:
+        if e.get("type") not in ("search", "category", "similar"):
+            continue
+        key = orjson.dumps([e["type"], e.get("params") or {}], option=orjson.OPT_SORT_KEYS)
+        counts[key] += 1
+        requests.setdefault(key, {"type": e["type"], "params": e.get("params") or {}})
+    return [requests[key] for key, _ in counts.most_common(n)]
+
+
+query_logger = QueryLog(
+    config.QUERY_LOG_PATH,
+    sample_rate=config.QUERY_LOG_SAMPLE_RATE,
+    max_bytes=config.QUERY_LOG_MAX_BYTES,
+)
@@ -0,0 +1,157 @@
+# app/services/snippets.py
+"""
+Query-relevant snippets for search hits.
+
+A snippet is one bounded passage of a field plus the ranges of the
+query matches inside it:
+    {"path": "content", "text": "...", "highlights": [[start, end], ...]}
+Ranges are in UTF-16 code units, the indices of JavaScript's
+String.slice, so emoji and other astral characters do not shift them.
+
+Atlas hits carry `highlights` from $search (see highlight_option());
+everything else (local backend, vector-only hybrid hits) goes through
+the local generator, which matches terms the same way local_search does.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.local_search import _within_one_edit, analyze, analyze_spans
+
+SNIPPET_PATHS = ("title", "content")
+MAX_PASSAGES = 3       # per path
+PASSAGE_CHARS = 160
+CONTEXT_BEFORE = 40    # chars kept before the first match of a passage
+SNAP_CHARS = 20        # how far a cut may move to land on whitespace
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def highlight_option() -> dict:
+    """`highlight` option for the Atlas $search stage."""
+    return {"path": list(SNIPPET_PATHS), "maxNumPassages": MAX_PASSAGES}
+
+
+def _snap_start(text: str, start: int) -> int:
+    """Move a cut forward to the next word boundary."""
+    if start <= 0:
+        return 0
+    m = _SPACE_RE.search(text, start, start + SNAP_CHARS)
+    return m.end() if m else start
+
+
+def _snap_end(text: str, end: int) -> int:
+    """Move a cut back to the previous word boundary."""
+    if end >= len(text):
+        return len(text)
+    spaces = list(_SPACE_RE.finditer(text, end - SNAP_CHARS, end))
+    return spaces[-1].start() if spaces else end
+
+
+def _utf16_offsets(text: str, offsets: List[int]) -> List[int]:
+    """Code-point offsets into text as UTF-16 code unit offsets."""
+    if text.isascii() or max(text) <= "\uffff":
+        return offsets  # no surrogate pairs: both counts agree
+    return [len(text[:i].encode("utf-16-le")) // 2 for i in offsets]
+
+
+def _passage(path: str, text: str, start: int, end: int,
+             spans: List[Tuple[int, int]]) -> Dict[str, Any]:
+    """Cut text[start:end] and rebase the spans that fall inside it."""
+    passage = text[start:end]
+    flat = _utf16_offsets(passage, [o - start for s, e in spans
+                                    if s >= start and e <= end for o in (s, e)])
+    return {
+        "path": path,
+        "text": passage,
+        "highlights": [flat[i:i + 2] for i in range(0, len(flat), 2)],
+    }
+
+
+def _window(text: str, spans: List[Tuple[int, int]], first: int) -> Tuple[int, int]:
+    """PASSAGE_CHARS window that starts a little before spans[first]."""
+    start = _snap_start(text, max(spans[first][0] - CONTEXT_BEFORE, 0))
+    end = _snap_end(text, start + PASSAGE_CHARS)
+    # Never cut through the match the window was built around
+    end = max(end, min(spans[first][1], len(text)))
+    return start, end
+
+
+def _match_spans(text: str, terms: List[str]) -> List[Tuple[int, int]]:
+    """Character ranges of tokens matching a query term (maxEdits 1)."""
+    return [
+        (start, end) for token, start, end in analyze_spans(text)
+        if any(token == t or (len(t) > 2 and _within_one_edit(token, t))
+               for t in terms)
+    ]
+
+
+def _field_snippets(path: str, text: str, terms: List[str]) -> List[Dict[str, Any]]:
+    spans = _match_spans(text, terms)
+    if not spans:
+        return []
+
+    # Score a window per match by the number of matches it covers,
+    # then keep the best non-overlapping ones
+    candidates = []
+    for i in range(len(spans)):
+        start, end = _window(text, spans, i)
+        covered = sum(1 for s, e in spans if s >= start and e <= end)
+        candidates.append((covered, -start, start, end))
+    candidates.sort(reverse=True)
+
+    chosen: List[Tuple[int, int]] = []
+    for _, _, start, end in candidates:
+        if all(end <= s or start >= e for s, e in chosen):
+            chosen.append((start, end))
+            if len(chosen) == MAX_PASSAGES:
+                break
+
+    return [_passage(path, text, start, end, spans) for start, end in chosen]
+
+
+def local_snippets(doc: Dict[str, Any], query: str) -> List[Dict[str, Any]]:
+    """Snippets for a hit from its stored title/content."""
+    terms = list(dict.fromkeys(analyze(query)))
+    if not terms:
+        return []
+    snippets = []
+    for path in SNIPPET_PATHS:
+        text = doc.get(path)
+        if isinstance(text, str) and text:
+            snippets.extend(_field_snippets(path, text, terms))
+    return snippets
+
+
+def atlas_snippets(highlights: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Convert Atlas searchHighlights to snippets.
+    Atlas passages are whole sentences of any length, so long ones are
+    trimmed to a PASSAGE_CHARS window around their first hit.
+    """
+    per_path: Dict[str, List[Tuple[float, Dict[str, Any]]]] = {}
+    for h in highlights or []:
+        text, spans = "", []
+        for part in h.get("texts") or []:
+            value = part.get("value") or ""
+            if part.get("type") == "hit":
+                spans.append((len(text), len(text) + len(value)))
+            text += value
+        if not spans:
+            continue
+        start, end = _window(text, spans, 0) if len(text) > PASSAGE_CHARS else (0, len(text))
+        path = h.get("path")
+        per_path.setdefault(path, []).append(
+            (h.get("score") or 0.0, _passage(path, text, start, end, spans)))
+
+    snippets = []
+    for path in SNIPPET_PATHS:
+        ranked = sorted(per_path.get(path, []), key=lambda p: p[0], reverse=True)
+        snippets.extend(p for _, p in ranked[:MAX_PASSAGES])
+    return snippets
+
+
+def hit_snippets(doc: Dict[str, Any], query: str) -> List[Dict[str, Any]]:
+    """Atlas highlights when the hit carries them, local ones otherwise."""
+    if "highlights" in doc:
+        return atlas_snippets(doc["highlights"])
+    return local_snippets(doc, query)
@@ -0,0 +1,160 @@
+# app/services/spelling.py
+"""
+"Did you mean" spelling correction from the hacks_all vocabulary.
+
+Terms are looked up with a symmetric-delete index (as in SymSpell):
+every vocabulary term is stored under the strings obtained by deleting
+up to MAX_EDITS characters from its first PREFIX_LENGTH characters. A
+misspelled word produces its own deletes, and any term sharing one of
+them is a candidate, so a lookup is a few dozen dict probes plus an
+edit-distance check on the candidates.
+
+Like the suggest index, it is a snapshot that keep_fresh() rebuilds in
+the background when the corpus generation changes.
+"""
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from app.services import corpus, mongo
+
+MAX_EDITS = 2
+PREFIX_LENGTH = 7      # only deletes within the first 7 chars are stored
+MIN_TERM_COUNT = 2     # terms seen in fewer hacks are treated as noise
+MIN_TERM_LENGTH = 3
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _deletes(word: str, max_edits: int) -> Set[str]:
+    """word plus every string reachable by deleting up to max_edits chars."""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_edits):
+        nxt = set()
+        for w in frontier:
+            if len(w) > 1:
+                nxt.update(w[:i] + w[i + 1:] for i in range(len(w)))
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+def edit_distance(a: str, b: str, max_edits: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions), or max_edits + 1 once it is known to be larger.
+    """
+    if abs(len(a) - len(b)) > max_edits:
+        return max_edits + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_edits:
+            return max_edits + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], max_edits + 1)
+
+
+class SpellingIndex:
+    """Symmetric-delete index over term -> document frequency."""
+
+    def __init__(self, counts: Dict[str, int]):
+        self._counts = {
+            t: n for t, n in counts.items()
+            if n >= MIN_TERM_COUNT and len(t) >= MIN_TERM_LENGTH
+        }
+        # Most delete keys belong to one term; store a bare str then
+        self._deletes: Dict[str, Union[str, List[str]]] = {}
+        for term in self._counts:
+            for key in _deletes(term[:PREFIX_LENGTH], MAX_EDITS):
+                current = self._deletes.get(key)
+                if current is None:
+                    self._deletes[key] = term
+                elif isinstance(current, str):
+                    self._deletes[key] = [current, term]
+                else:
+                    current.append(term)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def count(self, term: str) -> int:
+        return self._counts.get(term, 0)
+
+    def lookup(self, word: str) -> Optional[str]:
+        """Closest vocabulary term (fewest edits, then most frequent), or None."""
+        word = word.lower()
+        if word in self._counts or len(word) < MIN_TERM_LENGTH:
+            return None
+
+        candidates: Set[str] = set()
+        for key in _deletes(word[:PREFIX_LENGTH], MAX_EDITS):
+            found = self._deletes.get(key)
+            if found is None:
+                continue
+            if isinstance(found, str):
+                candidates.add(found)
+            else:
+                candidates.update(found)
+
+        best, best_rank = None, None
+        for term in candidates:
+            distance = edit_distance(word, term, MAX_EDITS)
+            if distance > MAX_EDITS:
+                continue
+            rank = (distance, -self._counts[term], term)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = term, rank
+        return best
+
+    def correct(self, query: str) -> Optional[str]:
+        """Query with unknown words replaced, or None if nothing changed."""
+        changed = False
+
+        def replace(m: "re.Match") -> str:
+            nonlocal changed
+            fixed = self.lookup(m.group())
+            if fixed is None:
+                return m.group()
+            changed = True
+            return fixed
+
+        corrected = _WORD_RE.sub(replace, query)
+        return corrected if changed else None
+
+    @classmethod
+    def from_documents(cls, docs: Iterable[dict]) -> "SpellingIndex":
+        counts: Counter = Counter()
+        for doc in docs:
+            words: Set[str] = set()
+            for field in ("title", "content", "excerpt", "tags", "categories"):
+                value = doc.get(field)
+                if isinstance(value, list):
+                    value = " ".join(v for v in value if isinstance(v, str))
+                if isinstance(value, str):
+                    words.update(_WORD_RE.findall(value.lower()))
+            counts.update(words)
+        return cls(counts)
+
+
+def _from_hacks_all() -> SpellingIndex:
+    projection = {"title": 1, "content": 1, "excerpt": 1, "tags": 1, "categories": 1}
+    return SpellingIndex.from_documents(
+        mongo.get_collection("hacks_all").find({}, projection))
+
+
+_snapshot: corpus.IndexSnapshot[SpellingIndex] = corpus.IndexSnapshot(
+    "spelling", "terms", _from_hacks_all)
+
+rebuild = _snapshot.rebuild
+current_index = _snapshot.current
+get_index = _snapshot.get
+keep_fresh = _snapshot.keep_fresh
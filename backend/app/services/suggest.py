@@ -0,0 +1,180 @@
+# app/services/suggest.py
+"""
+In-memory prefix index for /api/search/suggest (typeahead).
+
+Completions come from hack titles, tags, categories and IKEA product
+names. Every phrase is stored once per word it could be typed from
+("lack side table" is found by "lack", "side" and "table"), in one
+sorted list of keys, so a lookup is a bisect plus a short scan.
+Top completions for 1-3 character prefixes, where the scan would be
+long, are precomputed at build time.
+
+The index is a snapshot of hacks_all: keep_fresh() rebuilds it in the
+background whenever the corpus generation changes.
+"""
+import heapq
+import html
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from app.services import corpus, mongo
+from app.tokenization.config import IKEA_PRODUCT_NAMES
+
+# Kinds, in the order they win ties
+KINDS = ("product", "category", "tag", "title")
+
+MAX_SUGGESTIONS = 20
+SHORT_PREFIX_CHARS = 3   # prefixes up to this length are precomputed
+MAX_SCAN = 5000          # keys examined for longer prefixes
+MAX_TITLE_WORDS = 12     # later title words are not indexed as entry points
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse everything that is not a word character."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class SuggestIndex:
+    """Immutable prefix index over (phrase, kind, weight) entries."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str, int]]):
+        # One phrase per (normalized text, kind); weights add up
+        weights: Counter = Counter()
+        display: Dict[Tuple[str, str], str] = {}
+        for text, kind, weight in entries:
+            key = normalize(text)
+            if key:
+                weights[(key, kind)] += weight
+                display.setdefault((key, kind), text.strip())
+
+        self._text: List[str] = []
+        self._kind: List[str] = []
+        self._weight = array("I")
+        keyed: List[Tuple[str, int, int]] = []
+        for phrase_id, ((key, kind), weight) in enumerate(weights.items()):
+            self._text.append(display[(key, kind)])
+            self._kind.append(kind)
+            self._weight.append(weight)
+            words = key.split(" ")
+            limit = MAX_TITLE_WORDS if kind == "title" else len(words)
+            for i in range(min(len(words), limit)):
+                keyed.append((" ".join(words[i:]), phrase_id, int(i == 0)))
+        keyed.sort()
+
+        self._keys: List[str] = [k for k, _, _ in keyed]
+        self._ids = array("I", (p for _, p, _ in keyed))
+        self._starts = array("B", (s for _, _, s in keyed))
+
+        self._short: Dict[str, List[int]] = {}
+        self._precompute_short_prefixes()
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def _rank(self, phrase_id: int, key_pos: int) -> Tuple:
+        """Sort key: phrase starts with the prefix, weight, kind, shorter text."""
+        return (self._starts[key_pos], self._weight[phrase_id],
+                -KINDS.index(self._kind[phrase_id]), -len(self._text[phrase_id]))
+
+    def _top(self, lo: int, hi: int, limit: int) -> List[int]:
+        """Best distinct phrases among keys[lo:hi]."""
+        best: Dict[int, Tuple] = {}
+        for pos in range(lo, hi):
+            phrase_id = self._ids[pos]
+            rank = self._rank(phrase_id, pos)
+            if phrase_id not in best or rank > best[phrase_id]:
+                best[phrase_id] = rank
+        return heapq.nlargest(limit, best, key=best.__getitem__)
+
+    def _precompute_short_prefixes(self) -> None:
+        bounds: Dict[str, List[int]] = {}
+        for pos, key in enumerate(self._keys):
+            for n in range(1, min(SHORT_PREFIX_CHARS, len(key)) + 1):
+                span = bounds.get(key[:n])
+                if span is None:
+                    bounds[key[:n]] = [pos, pos + 1]
+                else:
+                    span[1] = pos + 1
+        self._short = {
+            prefix: self._top(lo, hi, MAX_SUGGESTIONS)
+            for prefix, (lo, hi) in bounds.items()
+        }
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, object]]:
+        """Completions for `prefix`, best first, one per distinct text."""
+        # Keep a trailing space: "lack " should not complete "lacking"
+        trailing_space = prefix[-1:].isspace()
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if trailing_space:
+            prefix += " "
+
+        if len(prefix) <= SHORT_PREFIX_CHARS:
+            ids = self._short.get(prefix, [])
+        else:
+            lo = bisect_left(self._keys, prefix)
+            hi = lo
+            end = min(len(self._keys), lo + MAX_SCAN)
+            while hi < end and self._keys[hi].startswith(prefix):
+                hi += 1
+            ids = self._top(lo, hi, MAX_SUGGESTIONS)
+
+        out: List[Dict[str, object]] = []
+        seen = set()
+        for phrase_id in ids:
+            text = self._text[phrase_id]
+            if text.lower() in seen:
+                continue
+            seen.add(text.lower())
+            out.append({
+                "text": text,
+                "kind": self._kind[phrase_id],
+                "count": self._weight[phrase_id],
+            })
+            if len(out) == limit:
+                break
+        return out
+
+    @classmethod
+    def from_collection(cls, collection) -> "SuggestIndex":
+        """Titles (weight 1), tags/categories and products (document counts)."""
+        products = {p.lower(): p for p in IKEA_PRODUCT_NAMES}
+        product_counts: Counter = Counter()
+
+        def entries():
+            for doc in collection.find({}, {"title": 1, "tags": 1, "categories": 1}):
+                title = doc.get("title")
+                words = set()
+                if isinstance(title, str) and title.strip():
+                    yield html.unescape(title), "title", 1
+                    words.update(_WORD_RE.findall(title.lower()))
+                for tag in set(doc.get("tags") or []):
+                    if isinstance(tag, str):
+                        yield tag, "tag", 1
+                        words.update(_WORD_RE.findall(tag.lower()))
+                for category in set(doc.get("categories") or []):
+                    if isinstance(category, str):
+                        yield html.unescape(category), "category", 1
+                for word in words & products.keys():
+                    product_counts[word] += 1
+            # Product lines are suggested even before any hack mentions them
+            for word, name in products.items():
+                yield name, "product", max(product_counts[word], 1)
+
+        return cls(entries())
+
+
+_snapshot: corpus.IndexSnapshot[SuggestIndex] = corpus.IndexSnapshot(
+    "suggest", "phrases",
+    lambda: SuggestIndex.from_collection(mongo.get_collection("hacks_all")))
+
+rebuild = _snapshot.rebuild
+current_index = _snapshot.current
+get_index = _snapshot.get
+keep_fresh = _snapshot.keep_fresh
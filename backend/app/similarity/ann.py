@@ -0,0 +1,151 @@
+# app/similarity/ann.py
+"""
+Nearest-neighbour search over the embedding matrix built by
+app.similarity.embeddings.
+
+The matrix is opened with np.load(mmap_mode="r"): every uvicorn worker
+maps the same file read-only, so the OS page cache holds one copy no
+matter how many workers serve queries. Rows are L2-normalized, so a
+dot product is the cosine similarity; queries scan the matrix in
+fixed-size blocks, which is exact and a few ms for our corpus size.
+"""
+import json
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core import config
+from app.similarity.embeddings import IDS_FILE, VECTORS_FILE, embed_texts
+
+BLOCK_ROWS = 8192
+
+
+class VectorIndex:
+    def __init__(self, vectors: np.ndarray, ids: List[str]):
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError(
+                f"Embedding matrix {vectors.shape} does not match {len(ids)} ids")
+        self.vectors = vectors
+        self.ids = ids
+        self._positions = {hack_id: pos for pos, hack_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @classmethod
+    def load(cls, directory: str) -> "VectorIndex":
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+        with open(os.path.join(directory, IDS_FILE)) as f:
+            ids = json.load(f)
+        return cls(vectors, ids)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (hack id, cosine similarity) for a normalized query vector."""
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        want = min(k + (1 if exclude else 0), len(self.ids))
+        if want <= 0:
+            return []
+
+        best_pos = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self.ids), BLOCK_ROWS):
+            scores = self.vectors[start:start + BLOCK_ROWS] @ query
+            if len(scores) > want:
+                top = np.argpartition(scores, -want)[-want:]
+            else:
+                top = np.arange(len(scores))
+            best_pos = np.concatenate([best_pos, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if len(best_scores) > want:
+                keep = np.argpartition(best_scores, -want)[-want:]
+                best_pos, best_scores = best_pos[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores)
+        results = [
+            (self.ids[best_pos[i]], float(best_scores[i])) for i in order
+            if self.ids[best_pos[i]] != exclude
+        ]
+        return results[:k]
+
+    def search_text(self, text: str, k: int = 10,
+                    timeout: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Nearest hacks to an embedded query. The embedding request gives up
+        after `timeout` seconds (default EMBED_QUERY_TIMEOUT_SECONDS), so a
+        slow Ollama cannot hold a threadpool worker for long.
+        """
+        if timeout is None:
+            timeout = config.EMBED_QUERY_TIMEOUT_SECONDS
+        return self.search(embed_texts([text], timeout=timeout)[0], k=k)
+
+    def similar_to(self, hack_id: str, k: int = 10) -> Optional[List[Tuple[str, float]]]:
+        """Neighbours of an indexed hack, or None if it has no vector."""
+        pos = self._positions.get(hack_id)
+        if pos is None:
+            return None
+        return self.search(self.vectors[pos], k=k, exclude=hack_id)
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+_signature: Optional[tuple] = None   # files the current index was mapped from
+_next_check = 0.0                    # monotonic time of the next stat()
+_retry_delay = 0.0                   # back-off after a failed load
+
+RETRY_MIN_SECONDS = 5.0
+RETRY_MAX_SECONDS = 300.0
+
+
+def _files_signature() -> Optional[tuple]:
+    """(mtime_ns, size) of the matrix and ids files, None if either is missing."""
+    try:
+        return tuple(
+            (st.st_mtime_ns, st.st_size) for st in (
+                os.stat(os.path.join(config.EMBEDDINGS_DIR, name))
+                for name in (VECTORS_FILE, IDS_FILE)))
+    except OSError:
+        return None
+
+
+def get_vector_index() -> Optional[VectorIndex]:
+    """
+    Return the process-wide index, mapping EMBEDDINGS_DIR on first use
+    and remapping it when `cli embed` rewrites the files (checked every
+    CORPUS_GENERATION_POLL_SECONDS). Returns None while no embeddings
+    have been built; a failed load is retried with back-off, and the
+    previous index, if any, keeps serving meanwhile.
+    """
+    global _index, _signature, _next_check, _retry_delay
+    if time.monotonic() < _next_check:
+        return _index
+    with _index_lock:
+        now = time.monotonic()
+        if now < _next_check:
+            return _index
+        _next_check = now + config.CORPUS_GENERATION_POLL_SECONDS
+        signature = _files_signature()
+        if signature is None or signature == _signature:
+            return _index
+        try:
+            index = VectorIndex.load(config.EMBEDDINGS_DIR)
+        except (OSError, ValueError) as e:
+            # E.g. caught between the two file swaps of a rebuild
+            _retry_delay = min(max(_retry_delay * 2, RETRY_MIN_SECONDS), RETRY_MAX_SECONDS)
+            _next_check = now + _retry_delay
+            print(f"[ann] Could not map embeddings (retrying in {_retry_delay:.0f}s): {e}")
+            return _index
+        _index, _signature, _retry_delay = index, signature, 0.0
+        print(f"[ann] Mapped {len(index)} x {index.dim} embeddings")
+    return _index
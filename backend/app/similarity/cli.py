@@ -0,0 +1,59 @@
+import argparse
+
+"""
+Builds the offline similarity data used by /api/search/similar/{hack_id}
+and /api/search/semantic. Run from the backend root:
+python -m app.similarity.cli neighbours
+python -m app.similarity.cli embed
+
+"""
+
+from app.similarity.embeddings import build_embeddings
+from app.similarity.neighbours import DEFAULT_K, build_neighbours
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute similarity data for the hacks in MongoDB."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    nb = commands.add_parser(
+        "neighbours", help="Top-K similar hacks for every hack (lexical).")
+    nb.add_argument(
+        "--k",
+        type=int,
+        default=DEFAULT_K,
+        help=f"Neighbours kept per hack (default: {DEFAULT_K}).",
+    )
+    nb.add_argument(
+        "--full",
+        action="store_true",
+        help="Recompute every hack, not only those whose content changed.",
+    )
+    nb.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Max number of hacks to recompute (default: no limit).",
+    )
+
+    emb = commands.add_parser(
+        "embed", help="Dense vector per hack, written to EMBEDDINGS_DIR.")
+    emb.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+        help="Hacks embedded per request (default: 32).",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "neighbours":
+        build_neighbours(k=args.k, full=args.full, limit=args.limit)
+    elif args.command == "embed":
+        build_embeddings(batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# app/similarity/embeddings.py
+"""
+CPU-only embedding stage: one dense, L2-normalized float32 vector per hack.
+
+The matrix is written to EMBEDDINGS_DIR as
+    vectors.npy   (n_hacks x dim float32, row i <-> ids[i])
+    ids.json      (hack _id strings)
+and memory-mapped by app.similarity.ann at serving time.
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, List
+
+import numpy as np
+import requests
+
+from app.core import config
+from app.services import mongo
+from app.services.local_search import analyze
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.json"
+
+HASHING_DIM = 512
+MAX_CONTENT_CHARS = 1000
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """Keep-alive connection to Ollama, one per thread."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def hack_text(doc: Dict[str, Any]) -> str:
+    """Text embedded for a hack: title, tags and the start of the content."""
+    tags = ", ".join(t for t in (doc.get("tags") or []) if isinstance(t, str))
+    content = (doc.get("content") or doc.get("excerpt") or "")
+    return f"{doc.get('title') or ''}\n{tags}\n{content[:MAX_CONTENT_CHARS]}"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _embed_hashing(texts: List[str]) -> np.ndarray:
+    """Signed feature hashing of terms and term bigrams (no model needed)."""
+    out = np.zeros((len(texts), HASHING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        terms = analyze(text)
+        features = terms + [a + " " + b for a, b in zip(terms, terms[1:])]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            out[row, h % HASHING_DIM] += 1.0 if (h >> 31) & 1 else -1.0
+    # Dampen repeated terms, keep the hash sign
+    return np.sign(out) * np.log1p(np.abs(out))
+
+
+def _embed_ollama(texts: List[str], timeout: float = 120) -> np.ndarray:
+    r = _session().post(
+        config.OLLAMA_EMBED_URL,
+        json={"model": config.EMBEDDING_MODEL, "input": texts},
+        timeout=timeout,
+    )
+    r.raise_for_status()
+    return np.asarray(r.json()["embeddings"], dtype=np.float32)
+
+
+def embed_texts(texts: List[str], timeout: float = 120) -> np.ndarray:
+    """
+    Embed texts with the configured backend; rows are L2-normalized.
+    `timeout` bounds the Ollama request (seconds).
+    """
+    if config.EMBEDDING_BACKEND == "hashing":
+        vectors = _embed_hashing(texts)
+    else:
+        vectors = _embed_ollama(texts, timeout=timeout)
+    return _normalize(vectors)
+
+
+def build_embeddings(batch_size: int = 32) -> None:
+    """Embed every hack in hacks_all and write the matrix to EMBEDDINGS_DIR."""
+    coll = mongo.get_collection("hacks_all")
+    projection = {"title": 1, "content": 1, "excerpt": 1, "tags": 1}
+
+    total = coll.estimated_document_count()
+    print(f"Embedding ~{total} hacks with {config.EMBEDDING_BACKEND}"
+          f" ({config.EMBEDDING_MODEL if config.EMBEDDING_BACKEND == 'ollama' else HASHING_DIM})")
+
+    start = time.time()
+    ids: List[str] = []
+    chunks: List[np.ndarray] = []
+    texts: List[str] = []
+
+    for doc in coll.find({}, projection).sort("_id", 1):
+        ids.append(str(doc["_id"]))
+        texts.append(hack_text(doc))
+        if len(texts) >= batch_size:
+            chunks.append(embed_texts(texts))
+            texts = []
+            print(f"Progress: {len(ids)}/{total} "
+                  f"({len(ids) / (time.time() - start):.1f} docs/s)")
+    if texts:
+        chunks.append(embed_texts(texts))
+
+    if not chunks:
+        print("No hacks to embed.")
+        return
+
+    matrix = np.ascontiguousarray(np.vstack(chunks), dtype=np.float32)
+
+    # Write next to the live files, then swap in atomically
+    os.makedirs(config.EMBEDDINGS_DIR, exist_ok=True)
+    vectors_path = os.path.join(config.EMBEDDINGS_DIR, VECTORS_FILE)
+    ids_path = os.path.join(config.EMBEDDINGS_DIR, IDS_FILE)
+    with open(vectors_path + ".tmp", "wb") as f:
+        np.save(f, matrix)
+    with open(ids_path + ".tmp", "w") as f:
+        json.dump(ids, f)
+    os.replace(vectors_path + ".tmp", vectors_path)
+    os.replace(ids_path + ".tmp", ids_path)
+
+    print(f"\n✓ Done! {matrix.shape[0]} x {matrix.shape[1]} matrix "
+          f"in {time.time() - start:.1f}s → {vectors_path}")
@@ -0,0 +1,157 @@
+# app/similarity/neighbours.py
+"""
+Offline top-K nearest-neighbour table for /api/search/similar/{hack_id}.
+
+hack_neighbours holds one document per hack:
+    {_id: <hack _id>, fingerprint: <hash of the indexed fields>,
+     neighbours: [{_id: <hack _id>, score: <float>}, ...]}
+
+Lists are computed with the in-process BM25 index (moreLikeThis over
+title/content/categories/tags), so the job needs no Atlas round trips.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+
+from app.services import mongo
+from app.services.local_search import LocalSearchIndex
+
+NEIGHBOURS_COLLECTION = "hack_neighbours"
+DEFAULT_K = 20
+WRITE_BATCH_SIZE = 500
+
+
+def doc_fingerprint(doc: Dict[str, Any]) -> str:
+    """Hash of the fields that similarity is computed from."""
+    payload = json.dumps(
+        [doc.get("title"), doc.get("content"),
+         doc.get("categories") or [], doc.get("tags") or []],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def build_neighbours(
+    k: int = DEFAULT_K,
+    full: bool = False,
+    limit: Optional[int] = None,
+) -> None:
+    """
+    Compute neighbour lists and store them in hack_neighbours.
+
+    Args:
+        k: Number of neighbours kept per hack
+        full: Recompute every hack instead of only the stale ones
+        limit: Max number of hacks to recompute (default: no limit)
+
+    A hack is stale when it has no entry, its fingerprint changed, or its
+    list points at a hack that changed or was deleted. A new or changed
+    hack may also belong in lists that are otherwise fine: a list is
+    recomputed too when it is short or its worst neighbour scores below
+    what the list's hack would score the new or changed one. BM25
+    statistics still drift as the corpus grows, so scores differ slightly
+    from a full rebuild (--full) until one is run.
+    """
+    db = mongo.get_db()
+    table = db[NEIGHBOURS_COLLECTION]
+
+    start = time.time()
+    index = LocalSearchIndex.from_collection(db["hacks_all"])
+    docs = index.docs
+    print(f"Indexed {len(docs)} hacks in {time.time() - start:.1f}s")
+
+    fingerprints = [doc_fingerprint(d) for d in docs]
+    positions = {d["id"]: pos for pos, d in enumerate(docs)}
+
+    existing: Dict[str, Dict[str, Any]] = {
+        str(e["_id"]): e
+        for e in table.find({}, {"fingerprint": 1, "neighbours": 1})
+    }
+
+    changed = {
+        d["id"] for d, fp in zip(docs, fingerprints)
+        if existing.get(d["id"], {}).get("fingerprint") != fp
+    }
+    removed = set(existing) - set(positions)
+
+    computed: Dict[int, List[Any]] = {}
+
+    def neighbours_of(pos: int) -> List[Any]:
+        if pos not in computed:
+            computed[pos] = index.more_like_this(pos, limit=k)
+        return computed[pos]
+
+    reached = 0
+    if full:
+        stale = list(range(len(docs)))
+    else:
+        invalid = changed | removed
+        stale = [
+            pos for pos, d in enumerate(docs)
+            if d["id"] in changed
+            or any(str(n["_id"]) in invalid
+                   for n in existing[d["id"]].get("neighbours", []))
+        ]
+        # Lists a new or changed hack now belongs in. Candidates are the
+        # hacks sharing its top terms; each is then scored exactly as its
+        # own list would score the new or changed hacks. Nothing to do
+        # when every list is being recomputed anyway (e.g. a first run).
+        stale_set = set(stale)
+        targets: Dict[int, List[int]] = {}
+        if len(stale_set) < len(docs):
+            for pos in [p for p in stale if docs[p]["id"] in changed]:
+                ranked = index.more_like_this(pos, limit=len(docs))
+                # nlargest: the head is exactly the hack's own top k
+                computed[pos] = ranked[:k]
+                for other, _ in ranked:
+                    if other not in stale_set:
+                        targets.setdefault(other, []).append(pos)
+        for other, new in targets.items():
+            current = [positions[str(n["_id"])]
+                       for n in existing[docs[other]["id"]].get("neighbours", [])
+                       if str(n["_id"]) in positions]
+            # Stored scores are from older corpus statistics: rescore both
+            scores = index.more_like_this_scores(other, current + new)
+            worst = min((scores[p] for p in current), default=0.0)
+            if len(current) < k or max(scores[p] for p in new) >= worst:
+                stale.append(other)
+                reached += 1
+    if limit is not None:
+        stale = stale[:limit]
+
+    print(f"Recomputing {len(stale)} of {len(docs)} neighbour lists "
+          f"({len(changed)} new or changed hacks, {reached} lists they now "
+          f"belong in, {len(removed)} removed hacks)")
+
+    ops: List[Any] = [DeleteOne({"_id": ObjectId(i)}) for i in removed]
+    now = datetime.now(timezone.utc)
+
+    for n, pos in enumerate(stale, start=1):
+        neighbours = [
+            {"_id": ObjectId(docs[other]["id"]), "score": round(score, 4)}
+            for other, score in neighbours_of(pos)
+        ]
+        ops.append(ReplaceOne(
+            {"_id": ObjectId(docs[pos]["id"])},
+            {
+                "fingerprint": fingerprints[pos],
+                "neighbours": neighbours,
+                "updated_at": now,
+            },
+            upsert=True,
+        ))
+
+        if len(ops) >= WRITE_BATCH_SIZE:
+            table.bulk_write(ops, ordered=False)
+            ops = []
+            print(f"Progress: {n}/{len(stale)}")
+
+    if ops:
+        table.bulk_write(ops, ordered=False)
+
+    print(f"\n✓ Done in {time.time() - start:.1f}s")
@@ -0,0 +1,80 @@
+# app/tokenization/checkpoint.py
+"""
+Resumable progress of a tagging run.
+
+The pipeline reads hacks in _id order. tokenization_checkpoints holds
+one document per kind of run (collection, TAGGING_VERSION, selection
+flags) with the highest _id below which every hack has been committed,
+plus the run counters:
+    {_id: "hacks_all:379a144bb76b:incremental", last_id: ObjectId(...),
+     status: "running" | "done", stats: {...}, started_at, updated_at}
+A run that finds a "running" checkpoint continues after last_id.
+"""
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.services.mongo import get_collection
+
+CHECKPOINT_COLLECTION = "tokenization_checkpoints"
+
+
+class Watermark:
+    """
+    Highest _id below which every read hack is committed, when hacks
+    finish out of order (concurrent tagging).
+    """
+
+    def __init__(self):
+        self._order: deque = deque()
+        self._done = set()
+        self.last_id: Optional[Any] = None
+
+    def read(self, _id: Any) -> None:
+        self._order.append(_id)
+
+    def done(self, _id: Any) -> None:
+        self._done.add(_id)
+
+    def advance(self) -> Optional[Any]:
+        while self._order and self._order[0] in self._done:
+            _id = self._order.popleft()
+            self._done.discard(_id)
+            self.last_id = _id
+        return self.last_id
+
+
+class Checkpoint:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self._coll = get_collection(CHECKPOINT_COLLECTION)
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The unfinished checkpoint of this run, if any."""
+        doc = self._coll.find_one({"_id": self.run_id})
+        if doc is None or doc.get("status") != "running":
+            return None
+        return doc
+
+    def start(self) -> None:
+        now = datetime.now(timezone.utc)
+        self._coll.replace_one(
+            {"_id": self.run_id},
+            {"status": "running", "last_id": None, "stats": {},
+             "started_at": now, "updated_at": now},
+            upsert=True,
+        )
+
+    def save(self, last_id: Optional[Any], stats: Dict[str, Any]) -> None:
+        self._coll.update_one(
+            {"_id": self.run_id},
+            {"$set": {"last_id": last_id, "stats": stats,
+                      "updated_at": datetime.now(timezone.utc)}},
+        )
+
+    def finish(self, stats: Dict[str, Any]) -> None:
+        self._coll.update_one(
+            {"_id": self.run_id},
+            {"$set": {"status": "done", "stats": stats,
+                      "updated_at": datetime.now(timezone.utc)}},
+        )
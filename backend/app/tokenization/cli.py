@@ -6,7 +6,8 @@ python -m app.tokenization.cli
 
 """
 
-from app.tokenization.pipeline import run_tokenization
+from app.tokenization.config import TAGGING_DOCS_PER_PROMPT, TAGGING_WORKERS
+from app.tokenization.pipeline import run_tokenization_concurrent
 
 
 def main():
@@ -19,10 +20,51 @@ def main():
         default=None,
         help="Max number of documents to process (default: no limit).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=TAGGING_WORKERS,
+        help=f"Concurrent LLM requests; 1 tags one hack at a time (default: {TAGGING_WORKERS}).",
+    )
+    parser.add_argument(
+        "--docs-per-prompt",
+        type=int,
+        default=TAGGING_DOCS_PER_PROMPT,
+        help=f"Hacks tagged per LLM request (default: {TAGGING_DOCS_PER_PROMPT}).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10,
+        help="Tagged hacks per Mongo bulk write and checkpoint (default: 10).",
+    )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Only tag hacks that have no categories or tags yet.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Re-tag hacks already tagged with the current prompt and model.",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint of an interrupted run and start over.",
+    )
     args = parser.parse_args()
 
-    run_tokenization(limit=args.limit)
-
+    # --workers only changes concurrency, not how hacks are tagged
+    run_tokenization_concurrent(
+        limit=args.limit,
+        workers=max(1, args.workers),
+        batch_size=args.batch_size,
+        skip_existing=args.skip_existing,
+        full=args.full,
+        resume=not args.restart,
+        docs_per_prompt=args.docs_per_prompt,
+    )
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,248 @@
 import os
 HACKS_COLLECTION_NAME = os.getenv("MONGO_COLLECTION_NAME")
 
+# LLM requests in flight at once (python -m app.tokenization.cli --workers).
+# Ollama only serves them in parallel up to its OLLAMA_NUM_PARALLEL.
+TAGGING_WORKERS = int(os.getenv("TAGGING_WORKERS", "4"))
+
+# Posts packed into one LLM request (--docs-per-prompt; 1 = one post per
+# request). Batched prompts are longer than Ollama's default context, so
+# they run with TAGGING_NUM_CTX tokens.
+TAGGING_DOCS_PER_PROMPT = int(os.getenv("TAGGING_DOCS_PER_PROMPT", "1"))
+TAGGING_NUM_CTX = int(os.getenv("TAGGING_NUM_CTX", "8192"))
+
+# A tagging run bumps the corpus generation (API cache flush and index
+# rebuilds) at most this often, and once when it ends
+TAGGING_GENERATION_BUMP_SECONDS = float(os.getenv("TAGGING_GENERATION_BUMP_SECONDS", "600"))
+
 IKEA_HACKS_CATEGORIES = ['3D Printed', 'Accessories', 'Candle Stands', 'Clocks', 'Decoration', 'Hangers, Hat &amp; Coat Racks', 'Mirrors', 'Wall Décor', 'Art', 'Bedroom', 'Bedroom Storage', 'Dressing Table', 'Headboards', 'IKEA Bed and Bedroom Storage Hacks', 'Ikea Nightstand Hacks', 'Wardrobes', 'Business', 'Children', 'Beds', 'Changing Tables', 'Cribs', 'Desks &amp; Chairs', 'Highchairs', 'Storage Furniture', 'Toys &amp; Play', 'Craft', 'Designer', 'Dining', 'Dining Tables &amp; Chairs', 'IKEA Bar Cabinet and Bar Cart Hacks', 'Serving Pieces', 'Entryway', 'Fabrics', 'Bags', 'Clothes', 'Curtains', 'Rugs', 'IKEA Bathroom Hacks', 'Bathroom Accessories', 'Bathroom Storage', 'Laundry', 'Vanity', 'IKEA Living Room Hacks', 'Cabinets &amp; Sideboards', 'Coffee &amp; Side Tables', 'IKEA Bookshelf Hacks', 'Room Divider', 'Seating', 'Sofas &amp; Stools',
                          'Kitchen', 'Cabinets', 'IKEA Cart Hacks', 'Ikea Kitchen Island Hacks', 'Pantry', 'Utensils', 'Work Tops', 'Landing', 'Console', 'Mudroom', 'Shoe Storage', 'Lighting', 'Ceiling', 'Floor Lamps', 'LEDs', 'Shades, Bases &amp; Cords', 'Table Lamps', 'Wall', 'Work Lamps', 'Media Storage', 'AV aids', 'Cable Management', 'DVD &amp; CD Storage', 'Gaming', 'IKEA TV and Entertainment Center Hacks', 'Stands', 'Tech &amp; Servers', 'Miscellaneous', 'Outdoor', 'Lounging', 'Outdoor Lighting', 'Plants', 'Pet Furniture', 'Cats', 'Critters', 'Dogs', 'Other Pets', 'Reptiles', 'Secondary Storage', 'Boxes &amp; Baskets', 'Equipment', 'Jewelry Holders', 'Organizers', 'Recycling', 'Shelves', 'Summer', 'Tools', 'Weekend project', 'Work Station', 'Chairs', 'Home Office', 'IKEA Desk Hacks', 'Monitor &amp; Laptop Stands', 'Music &amp; DJ', 'JULES']
+
+# Hacks the rule-based tagger (rules.py) scores at least this confident
+# are not sent to the LLM; above 1 every hack goes to the LLM
+TAGGING_RULE_CONFIDENCE = float(os.getenv("TAGGING_RULE_CONFIDENCE", "0.8"))
+
+# IKEA product lines used for rule-based tagging and /api/search/suggest,
+# in capitals without diacritics (BESTÅ -> BESTA)
+IKEA_PRODUCT_NAMES = [
+    "KALLAX", "BILLY", "LACK", "MALM", "HEMNES", "BESTA",
+    "PAX", "IVAR", "EKET", "FJALLBO", "TARVA", "RAST",
+    "VITTSJO", "BRIMNES", "ALEX", "MICKE", "LISABO",
+    # Storage and shelving
+    "ALGOT", "BOAXEL", "ELVARLI", "HEJNE", "OMAR", "GORM", "JOSTEIN",
+    "BROR", "PLATSA", "KOMPLEMENT", "NORDKISA", "SKUBB", "EKBY",
+    "BERGSHULT", "BURHULT", "MOSSLANDA", "RIBBA", "DETOLF",
+    "FABRIKOR", "MILSBO", "RUDSTA", "BLAALIDEN", "HAVSTA", "BAGGEBO",
+    "FJALKINGE", "LOMMARP", "IDANAS", "TONSTAD", "STALL", "TRONES",
+    "BISSA", "MACKAPAR", "SAMLA", "KUGGIS", "DRONA", "BRANAS", "TJENA",
+    "SKADIS", "UPPSPEL", "SIGNUM", "ODDVAR", "KNARREVIK", "HAUGA",
+    "NORDLI", "KULLEN", "SONGESAND", "GURSKEN",
+    # Beds
+    "NEIDEN", "SLATTUM", "ASKVOLL", "FLEKKE", "UTAKER", "TYSSEDAL",
+    # Living room and seating
+    "POANG", "STRANDMON", "EKTORP", "KLIPPAN", "SODERHAMN", "KIVIK",
+    "FRIHETEN", "LANDSKRONA", "VIMLE", "TULLSTA", "EKENAS", "KOARP",
+    "FROSTA", "DALFRED", "BEKVAM", "KULLABERG", "VEDBO", "LIATORP",
+    # Dining
+    "INGATORP", "DOCKSTA", "MELLTORP", "NORDEN", "EKEDALEN", "BJURSTA",
+    "GAMLEBY", "NORRAKER", "TARSELE", "VOXLOV", "MORBYLANGA", "INGOLF",
+    "TERJE", "ADDE", "STEFAN", "LEIFARNE", "NORRARYD", "ODGER", "JANINGE",
+    # Kitchen
+    "METOD", "SEKTION", "VARDE", "STENSTORP", "FORHOJA", "RASKOG",
+    "NISSAFORS", "GRUNDTAL", "KUNGSFORS", "HULTARP", "VARIERA",
+    "TORNVIKEN", "KUNGSBACKA", "BODBYN", "AXSTAD", "VOXTORP", "HITTARP",
+    # Bathroom
+    "GODMORGON", "LILLANGEN", "ENHET", "SILVERAN", "MOLGER",
+    "RAGRUND", "TOFTBYN", "SAVERN", "HAVBACK", "TANNFORSEN",
+    # Office
+    "LINNMON", "BEKANT", "IDASEN", "TROTTEN", "SKARSTA", "HILVER",
+    "LAGKAPTEN", "ADILS", "OLOV", "KRILLE", "MITTZON", "MARKUS",
+    "FLINTAN", "MILLBERGET", "RENBERGET", "JARVFJALLET", "LOBERGET",
+    "SKRUVSTA", "VOLMAR",
+    # Children
+    "TROFAST", "FLISAT", "KURA", "MAMMUT", "BUSUNGE", "SUNDVIK",
+    "SNIGLAR", "GULLIVER", "DUKTIG", "LATT", "SOLGUL", "HENSVIK",
+    "SMASTAD", "STUVA", "KRITTER", "MINNEN", "ANTILOP",
+    # Lighting
+    "HEKTAR", "FORSA", "TERTIAL", "LERSTA", "REGOLIT", "BARLAST",
+    "SKURUP", "RANARP", "SOLVINDEN", "HEMMA",
+    # Outdoor and plants
+    "APPLARO", "ASKHOLMEN", "TARNO", "NAMMARO", "RUNNEN", "SJALLAND",
+    "FROSON", "KUNGSHOLMEN", "SOCKER", "HIMMELSK", "FEJKA",
+    # Textiles, mirrors, hangers, pets
+    "HOVET", "STAVE", "LINDBYN", "NISSEDAL", "BUMERANG", "TJUSIG",
+    "PINNIG", "RITVA", "MERETE", "VIVAN", "HILJA", "LOHALS", "TIPHEDE",
+    "FRAKTA", "LURVIG",
+]
+
+# Product names that are also ordinary words or first names ("lack of
+# space", "Billy's desk"); they only count written in capitals or right
+# after "IKEA"
+IKEA_AMBIGUOUS_PRODUCT_NAMES = {
+    "LACK", "BILLY", "ALEX", "MICKE", "IVAR", "OMAR", "GORM", "BROR",
+    "STALL", "TERJE", "ADDE", "STEFAN", "INGOLF", "MARKUS", "NORDEN",
+    "KURA", "LATT", "HEMMA", "SAMLA", "ENHET", "VARDE",
+}
+
+# Category a product line almost always ends up in
+IKEA_PRODUCT_CATEGORIES = {
+    "BILLY": "IKEA Bookshelf Hacks",
+    "PAX": "Wardrobes", "ALGOT": "Wardrobes", "BOAXEL": "Wardrobes",
+    "ELVARLI": "Wardrobes", "PLATSA": "Wardrobes", "NORDKISA": "Wardrobes",
+    "MALM": "Bedroom", "TARVA": "Bedroom", "NEIDEN": "Bedroom",
+    "SLATTUM": "Bedroom", "ASKVOLL": "Bedroom", "UTAKER": "Bedroom",
+    "NORDLI": "Bedroom Storage", "RAST": "Ikea Nightstand Hacks",
+    "KNARREVIK": "Ikea Nightstand Hacks",
+    "LACK": "Coffee &amp; Side Tables",
+    "BESTA": "IKEA TV and Entertainment Center Hacks",
+    "POANG": "Seating", "STRANDMON": "Seating", "TULLSTA": "Seating",
+    "EKENAS": "Seating", "KOARP": "Seating",
+    "EKTORP": "Sofas &amp; Stools", "KLIPPAN": "Sofas &amp; Stools",
+    "SODERHAMN": "Sofas &amp; Stools", "KIVIK": "Sofas &amp; Stools",
+    "FRIHETEN": "Sofas &amp; Stools", "LANDSKRONA": "Sofas &amp; Stools",
+    "VIMLE": "Sofas &amp; Stools", "FROSTA": "Sofas &amp; Stools",
+    "DALFRED": "Sofas &amp; Stools",
+    "INGATORP": "Dining Tables &amp; Chairs", "DOCKSTA": "Dining Tables &amp; Chairs",
+    "MELLTORP": "Dining Tables &amp; Chairs", "NORDEN": "Dining Tables &amp; Chairs",
+    "EKEDALEN": "Dining Tables &amp; Chairs", "BJURSTA": "Dining Tables &amp; Chairs",
+    "GAMLEBY": "Dining Tables &amp; Chairs", "NORRAKER": "Dining Tables &amp; Chairs",
+    "TARSELE": "Dining Tables &amp; Chairs", "VOXLOV": "Dining Tables &amp; Chairs",
+    "MORBYLANGA": "Dining Tables &amp; Chairs", "INGOLF": "Dining Tables &amp; Chairs",
+    "TERJE": "Dining Tables &amp; Chairs", "ADDE": "Dining Tables &amp; Chairs",
+    "STEFAN": "Dining Tables &amp; Chairs", "LEIFARNE": "Dining Tables &amp; Chairs",
+    "NORRARYD": "Dining Tables &amp; Chairs", "ODGER": "Dining Tables &amp; Chairs",
+    "JANINGE": "Dining Tables &amp; Chairs",
+    "METOD": "Kitchen", "SEKTION": "Kitchen", "VARDE": "Kitchen",
+    "GRUNDTAL": "Kitchen", "KUNGSFORS": "Kitchen", "HULTARP": "Kitchen",
+    "KUNGSBACKA": "Kitchen", "BODBYN": "Kitchen", "AXSTAD": "Kitchen",
+    "VOXTORP": "Kitchen", "HITTARP": "Kitchen",
+    "STENSTORP": "Ikea Kitchen Island Hacks", "TORNVIKEN": "Ikea Kitchen Island Hacks",
+    "FORHOJA": "IKEA Cart Hacks", "RASKOG": "IKEA Cart Hacks",
+    "NISSAFORS": "IKEA Cart Hacks",
+    "GODMORGON": "Vanity", "LILLANGEN": "Vanity", "SAVERN": "Vanity",
+    "HAVBACK": "Vanity", "TANNFORSEN": "Vanity",
+    "MOLGER": "Bathroom Storage", "RAGRUND": "Bathroom Storage",
+    "MICKE": "IKEA Desk Hacks", "LINNMON": "IKEA Desk Hacks",
+    "BEKANT": "IKEA Desk Hacks", "IDASEN": "IKEA Desk Hacks",
+    "TROTTEN": "IKEA Desk Hacks", "SKARSTA": "IKEA Desk Hacks",
+    "HILVER": "IKEA Desk Hacks", "LAGKAPTEN": "IKEA Desk Hacks",
+    "MITTZON": "IKEA Desk Hacks",
+    "MARKUS": "Chairs", "FLINTAN": "Chairs", "MILLBERGET": "Chairs",
+    "RENBERGET": "Chairs", "JARVFJALLET": "Chairs", "LOBERGET": "Chairs",
+    "SKRUVSTA": "Chairs", "VOLMAR": "Chairs",
+    "KURA": "Beds", "MINNEN": "Beds", "BUSUNGE": "Beds",
+    "SNIGLAR": "Cribs", "GULLIVER": "Cribs", "ANTILOP": "Highchairs",
+    "DUKTIG": "Toys &amp; Play", "TROFAST": "Children", "FLISAT": "Children",
+    "LATT": "Children", "MAMMUT": "Children",
+    "TERTIAL": "Work Lamps", "FORSA": "Work Lamps", "LERSTA": "Floor Lamps",
+    "REGOLIT": "Shades, Bases &amp; Cords", "HEMMA": "Shades, Bases &amp; Cords",
+    "SOLVINDEN": "Outdoor Lighting",
+    "APPLARO": "Outdoor", "ASKHOLMEN": "Outdoor", "TARNO": "Outdoor",
+    "NAMMARO": "Outdoor", "RUNNEN": "Outdoor", "SJALLAND": "Outdoor",
+    "FROSON": "Outdoor", "KUNGSHOLMEN": "Outdoor",
+    "SOCKER": "Plants", "HIMMELSK": "Plants", "FEJKA": "Plants",
+    "STALL": "Shoe Storage", "TRONES": "Shoe Storage", "BISSA": "Shoe Storage",
+    "MACKAPAR": "Shoe Storage",
+    "SAMLA": "Boxes &amp; Baskets", "KUGGIS": "Boxes &amp; Baskets",
+    "DRONA": "Boxes &amp; Baskets", "BRANAS": "Boxes &amp; Baskets",
+    "TJENA": "Boxes &amp; Baskets", "SKUBB": "Organizers", "SKADIS": "Organizers",
+    "EKBY": "Shelves", "BERGSHULT": "Shelves", "BURHULT": "Shelves",
+    "MOSSLANDA": "Shelves", "RIBBA": "Wall Décor",
+    "DETOLF": "Cabinets &amp; Sideboards", "FABRIKOR": "Cabinets &amp; Sideboards",
+    "MILSBO": "Cabinets &amp; Sideboards", "RUDSTA": "Cabinets &amp; Sideboards",
+    "BLAALIDEN": "Cabinets &amp; Sideboards", "HAVSTA": "Cabinets &amp; Sideboards",
+    "BAGGEBO": "Cabinets &amp; Sideboards", "TONSTAD": "Cabinets &amp; Sideboards",
+    "SIGNUM": "Cable Management",
+    "HOVET": "Mirrors", "STAVE": "Mirrors", "LINDBYN": "Mirrors", "NISSEDAL": "Mirrors",
+    "BUMERANG": "Hangers, Hat &amp; Coat Racks", "TJUSIG": "Hangers, Hat &amp; Coat Racks",
+    "PINNIG": "Hangers, Hat &amp; Coat Racks",
+    "RITVA": "Curtains", "MERETE": "Curtains", "VIVAN": "Curtains", "HILJA": "Curtains",
+    "LOHALS": "Rugs", "TIPHEDE": "Rugs", "FRAKTA": "Bags", "LURVIG": "Pet Furniture",
+}
+
+# Words and phrases that place a hack in a category; plurals match too
+IKEA_CATEGORY_KEYWORDS = {
+    "3D Printed": ["3d print", "3d printed", "3d printer"],
+    "Art": ["artwork", "canvas"],
+    "Bags": ["tote bag", "handbag"],
+    "Bathroom Storage": ["bathroom storage", "towel rack", "towel storage"],
+    "Beds": ["loft bed", "bunk bed", "toddler bed", "kids bed", "montessori bed"],
+    "Bedroom": ["bedroom", "bed frame", "platform bed"],
+    "Bedroom Storage": ["dresser", "chest of drawers", "under bed storage"],
+    "Boxes &amp; Baskets": ["basket", "storage box"],
+    "Cabinets": ["kitchen cabinet", "upper cabinet", "wall cabinet"],
+    "Cabinets &amp; Sideboards": ["sideboard", "credenza", "buffet", "display cabinet"],
+    "Cable Management": ["cable management", "cable tray"],
+    "Candle Stands": ["candle holder", "candle stand", "candlestick"],
+    "Cats": ["cat", "cat tree", "litter box", "cat bed", "scratching post"],
+    "Changing Tables": ["changing table"],
+    "Children": ["kids room", "nursery", "playroom", "children"],
+    "Clocks": ["clock"],
+    "Coffee &amp; Side Tables": ["coffee table", "side table", "end table"],
+    "Console": ["console table"],
+    "Craft": ["craft room", "craft table", "sewing table", "craft storage"],
+    "Cribs": ["crib"],
+    "Critters": ["hamster", "guinea pig", "rabbit hutch", "bunny"],
+    "Curtains": ["curtain", "drape"],
+    "Dining": ["dining room", "breakfast nook", "banquette"],
+    "Dining Tables &amp; Chairs": ["dining table", "dining chair", "kitchen table"],
+    "Dogs": ["dog", "dog bed", "dog crate"],
+    "Dressing Table": ["dressing table", "makeup vanity", "makeup table"],
+    "DVD &amp; CD Storage": ["dvd storage", "cd storage"],
+    "Entryway": ["entryway", "hallway", "foyer"],
+    "Fabrics": ["upholstery", "slipcover", "reupholster"],
+    "Floor Lamps": ["floor lamp"],
+    "Gaming": ["gaming", "gaming desk", "arcade cabinet"],
+    "Hangers, Hat &amp; Coat Racks": ["coat rack", "hat rack", "coat hook", "clothes rack", "clothing rack"],
+    "Headboards": ["headboard"],
+    "Highchairs": ["high chair", "highchair"],
+    "Home Office": ["home office"],
+    "IKEA Bar Cabinet and Bar Cart Hacks": ["bar cabinet", "bar cart", "home bar", "wine rack"],
+    "IKEA Bathroom Hacks": ["bathroom"],
+    "IKEA Bed and Bedroom Storage Hacks": ["storage bed", "murphy bed", "daybed"],
+    "IKEA Bookshelf Hacks": ["bookshelf", "bookcase"],
+    "IKEA Cart Hacks": ["cart", "trolley", "utility cart"],
+    "IKEA Desk Hacks": ["desk", "standing desk", "sit stand desk", "floating desk"],
+    "IKEA Living Room Hacks": ["living room"],
+    "IKEA TV and Entertainment Center Hacks": ["tv stand", "tv unit", "tv console", "media console", "entertainment center", "media unit"],
+    "Ikea Kitchen Island Hacks": ["kitchen island"],
+    "Ikea Nightstand Hacks": ["nightstand", "night stand", "bedside table"],
+    "Jewelry Holders": ["jewelry", "jewellery"],
+    "Kitchen": ["kitchen"],
+    "Laundry": ["laundry", "washing machine", "laundry hamper"],
+    "LEDs": ["led strip", "led light", "led lighting"],
+    "Lighting": ["lighting", "lamp"],
+    "Lounging": ["lounger", "sun lounger", "hammock", "daybed"],
+    "Media Storage": ["media storage", "vinyl storage", "record storage"],
+    "Mirrors": ["mirror"],
+    "Monitor &amp; Laptop Stands": ["monitor stand", "laptop stand", "monitor riser"],
+    "Mudroom": ["mudroom", "mud room"],
+    "Music &amp; DJ": ["dj booth", "turntable", "record player", "vinyl"],
+    "Organizers": ["organizer", "organiser", "drawer organizer", "pegboard"],
+    "Other Pets": ["aquarium", "fish tank", "bird cage"],
+    "Outdoor": ["outdoor", "patio", "balcony", "garden"],
+    "Outdoor Lighting": ["outdoor lighting", "garden light"],
+    "Pantry": ["pantry", "spice rack"],
+    "Pet Furniture": ["pet bed", "pet feeder", "pet"],
+    "Plants": ["plant stand", "planter", "plant", "greenhouse", "herb garden", "succulent"],
+    "Recycling": ["recycling", "trash can", "garbage bin"],
+    "Reptiles": ["reptile", "terrarium", "vivarium"],
+    "Room Divider": ["room divider"],
+    "Rugs": ["rug"],
+    "Seating": ["bench", "window seat", "armchair", "seating"],
+    "Shades, Bases &amp; Cords": ["lampshade", "lamp shade", "lamp base"],
+    "Shelves": ["shelf", "shelves", "shelving", "wall shelf", "floating shelf"],
+    "Shoe Storage": ["shoe storage", "shoe rack", "shoe cabinet", "shoe bench"],
+    "Sofas &amp; Stools": ["sofa", "couch", "stool", "ottoman", "footstool"],
+    "Table Lamps": ["table lamp"],
+    "Tech &amp; Servers": ["server rack", "network rack", "homelab", "server"],
+    "Tools": ["tool storage", "workbench", "tool wall"],
+    "Toys &amp; Play": ["play kitchen", "dollhouse", "toy storage", "lego table", "train table", "lego"],
+    "Vanity": ["vanity", "bathroom sink", "sink cabinet"],
+    "Wall": ["wall lamp", "sconce", "wall light"],
+    "Wall Décor": ["wall decor", "wall art", "gallery wall", "picture ledge"],
+    "Wardrobes": ["wardrobe", "closet", "walk in closet", "armoire"],
+    "Work Lamps": ["desk lamp", "work lamp"],
+    "Work Station": ["workstation", "work station"],
+    "Work Tops": ["countertop", "worktop", "butcher block"],
+}
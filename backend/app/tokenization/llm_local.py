@@ -1,13 +1,35 @@
 # app/tokenization/llm_local.py
+import hashlib
 import json
+import threading
 import requests
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 
 from app.models import Hack
-from app.tokenization.config import IKEA_HACKS_CATEGORIES
+from app.tokenization.config import IKEA_HACKS_CATEGORIES, TAGGING_NUM_CTX
+from app.tokenization.rules import RULES_VERSION, tag_hack_with_rules
 
 OLLAMA_URL = "http://localhost:11434/api/chat"
 MODEL_NAME = "llama3.2:3b"
+LLM_OPTIONS = {
+    "temperature": 0.3,  # Lower temperature for more consistent output
+    "top_p": 0.9,
+}
+PROMPT_CONTENT_CHARS = 800
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """
+    Keep-alive HTTP session of the calling thread, so consecutive calls
+    reuse one connection to Ollama (requests.Session is not thread-safe,
+    hence one per tagging thread).
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
 
 # Improved system prompt with examples and clearer instructions
 SYSTEM_PROMPT = f"""
@@ -43,10 +65,41 @@ Output: {{"categories": ["IKEA Bookshelf Hacks", "IKEA Living Room Hacks"], "tag
 Now tag the following post. Output ONLY valid JSON, no markdown, no explanation:
 """
 
+# Multi-document prompts (tag_hacks_with_llm_batch): the user message
+# lists the posts under short ids and asks for one result per id
+BATCH_INSTRUCTIONS = """
+Tag each of the {n} posts below independently, as in the examples.
+Output ONLY one JSON object of the form
+{{"results": [{{"id": "1", "categories": [...], "tags": [...]}}, ...]}}
+with exactly one entry per post id, no markdown, no explanation.
+"""
+
+# Identifies the prompt and model an LLM result came from (memo.py)
+LLM_VERSION = hashlib.sha1(
+    json.dumps([MODEL_NAME, LLM_OPTIONS, SYSTEM_PROMPT, BATCH_INSTRUCTIONS,
+                PROMPT_CONTENT_CHARS], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+# Identifies the prompt, model and rules a stored tagging came from;
+# changing any of them makes every hack due for re-tagging (see
+# pipeline.py). Changing only the rules keeps the memoized LLM results.
+TAGGING_VERSION = hashlib.sha1(
+    f"{LLM_VERSION}:{RULES_VERSION}".encode("utf-8")).hexdigest()[:12]
+
+
+def tagging_fingerprint(hack: Hack) -> str:
+    """
+    Hash of the text the LLM is shown for a hack plus LLM_VERSION.
+    Reposts of the same post under another source/url share it.
+    """
+    content = (hack.content or hack.excerpt or "")[:PROMPT_CONTENT_CHARS]
+    key = json.dumps([LLM_VERSION, hack.title, content])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
 
 def _build_user_prompt(hack: Hack) -> str:
     """Build a concise user prompt with all available information."""
-    content = (hack.content or hack.excerpt or "")[:800]
+    content = (hack.content or hack.excerpt or "")[:PROMPT_CONTENT_CHARS]
 
     # Include image URL info if available - visual context helps
     has_image = " (includes image)" if hack.image_url else ""
@@ -151,16 +204,13 @@ def tag_hack_with_llm(
         attempt += 1
 
         try:
-            r = requests.post(
+            r = _session().post(
                 OLLAMA_URL,
                 json={
                     "model": MODEL_NAME,
                     "messages": messages,
                     "stream": False,
-                    "options": {
-                        "temperature": 0.3,  # Lower temperature for more consistent output
-                        "top_p": 0.9,
-                    }
+                    "options": LLM_OPTIONS,
                 },
                 timeout=timeout,
             )
@@ -231,21 +281,103 @@ def tag_hack_with_fallback(hack: Hack) -> Tuple[List[str], List[str]]:
     categories, tags = tag_hack_with_llm(hack)
 
     if not categories and not tags:
-        # Fallback: extract IKEA product names from title/content
-        text = f"{hack.title} {hack.content or hack.excerpt or ''}".upper()
+        # Fallback: whatever the rules find, however unsure
+        categories, tags, _ = tag_hack_with_rules(hack)
 
-        common_products = [
-            "KALLAX", "BILLY", "LACK", "MALM", "HEMNES", "BESTA",
-            "PAX", "IVAR", "EKET", "FJALLBO", "TARVA", "RAST",
-            "VITTSJO", "BRIMNES", "ALEX", "MICKE", "LISABO"
-        ]
+    return categories, tags
 
-        fallback_tags = [p for p in common_products if p in text]
 
-        if fallback_tags:
-            return [], fallback_tags
+def _build_batch_prompt(hacks: List[Hack]) -> str:
+    posts = []
+    for i, hack in enumerate(hacks, start=1):
+        content = (hack.content or hack.excerpt or "")[:PROMPT_CONTENT_CHARS]
+        has_image = " (includes image)" if hack.image_url else ""
+        posts.append(
+            f"Post id {i}{has_image}:\n"
+            f'{{"title": {json.dumps(hack.title)}, "content": {json.dumps(content)}}}')
+    return BATCH_INSTRUCTIONS.format(n=len(hacks)) + "\n" + "\n\n".join(posts) + "\n"
 
-    return categories, tags
+
+def _tag_batch_once(
+    hacks: List[Hack],
+    timeout: int,
+) -> Dict[int, Tuple[List[str], List[str]]]:
+    """One multi-document request; index in `hacks` -> valid (categories, tags)."""
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _build_batch_prompt(hacks)},
+    ]
+    label = f"batch of {len(hacks)} ({hacks[0].title[:30]!r}, ...)"
+    try:
+        r = _session().post(
+            OLLAMA_URL,
+            json={
+                "model": MODEL_NAME,
+                "messages": messages,
+                "stream": False,
+                "format": "json",
+                "options": {**LLM_OPTIONS, "num_ctx": TAGGING_NUM_CTX},
+            },
+            timeout=timeout,
+        )
+        r.raise_for_status()
+        text = _clean_llm_response(r.json().get("message", {}).get("content", ""))
+        parsed = json.loads(text)
+    except requests.exceptions.Timeout:
+        print(f"[LLM ERROR] Timeout for {label}")
+        return {}
+    except Exception as e:
+        print(f"[LLM ERROR] Request failed for {label}: {e}")
+        return {}
+
+    entries = parsed.get("results") if isinstance(parsed, dict) else None
+    if not isinstance(entries, list):
+        print(f"[LLM ERROR] Invalid response structure for {label}")
+        return {}
+
+    results: Dict[int, Tuple[List[str], List[str]]] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(str(entry.get("id")).strip()) - 1
+        except ValueError:
+            continue
+        raw_categories = entry.get("categories") or []
+        raw_tags = entry.get("tags") or []
+        if (not 0 <= index < len(hacks) or index in results
+                or not isinstance(raw_categories, list) or not isinstance(raw_tags, list)):
+            continue
+        categories, tags = _validate_and_clean_tags(raw_categories, raw_tags)
+        if categories or tags:
+            results[index] = (categories, tags)
+    return results
+
+
+def tag_hacks_with_llm_batch(
+    hacks: List[Hack],
+    fallback: Callable[[Hack], Tuple[List[str], List[str]]] = tag_hack_with_llm,
+    timeout_per_hack: int = 120,
+) -> List[Tuple[List[str], List[str]]]:
+    """
+    Tag several hacks with one request, so the system prompt (categories
+    and few-shot examples) is processed once for all of them.
+
+    Entries that are missing, malformed or have no valid categories/tags
+    are tagged again one by one with `fallback`.
+
+    Returns:
+        (categories, tags) per hack, in the order of `hacks`
+    """
+    if len(hacks) == 1:
+        return [fallback(hacks[0])]
+
+    results = _tag_batch_once(hacks, timeout=timeout_per_hack * len(hacks))
+    if len(results) < len(hacks):
+        print(f"[LLM WARNING] {len(hacks) - len(results)} of {len(hacks)} "
+              f"batched posts need a single-post retry")
+    return [results[i] if i in results else fallback(hack)
+            for i, hack in enumerate(hacks)]
 
 
 # Improved pipeline.py functions
@@ -263,6 +395,7 @@ def run_tokenization_batch(
         skip_existing: If True, skip hacks that already have categories/tags
     """
     from bson import ObjectId
+    from app.services.corpus import bump_generation
     from app.services.mongo import get_collection
     from app.tokenization.config import HACKS_COLLECTION_NAME
 
@@ -325,7 +458,8 @@ def run_tokenization_batch(
             "id": hack.id,
             "categories": categories,
             "tags": tags,
-            "title": hack.title
+            "title": hack.title,
+            "old_categories": doc.get("categories") or [],
         })
 
         # Commit batch
@@ -343,24 +477,50 @@ def run_tokenization_batch(
         successful += len(batch)
         processed += len(batch)
 
+    # Let the API drop cached responses built from the old tags
+    bump_generation()
+
     print(
         f"\n✓ Done! Processed {processed} hacks ({successful} successful, {failed} failed)")
 
 
 def _commit_batch(coll, batch: List[dict]) -> None:
-    """Commit a batch of updates to MongoDB."""
+    """Commit a batch of updates to MongoDB in one unordered bulk write."""
+    from collections import Counter
     from bson import ObjectId
+    from pymongo import UpdateOne
+    from app.services import category_stats
 
+    delta: Counter = Counter()
+    ops = []
     for item in batch:
-        coll.update_one(
-            {"_id": ObjectId(item["id"])},
-            {"$set": {
-                "categories": item["categories"],
-                "tags": item["tags"]
-            }},
-        )
+        update = {"categories": item["categories"], "tags": item["tags"]}
+        unset = {}
+        if item.get("fingerprint"):
+            # Marks the hack as tagged by this prompt/model (pipeline.py)
+            update["llm_fingerprint"] = item["fingerprint"]
+            update["llm_version"] = TAGGING_VERSION
+        else:
+            # Not final (e.g. rules after an LLM failure): due again next run
+            unset = {"llm_fingerprint": "", "llm_version": ""}
+        if item.get("tagged_by"):
+            update["tagged_by"] = item["tagged_by"]  # "rules" or "llm"
+        change = {"$set": update}
+        if unset:
+            change["$unset"] = unset
+        ops.append(UpdateOne({"_id": ObjectId(item["id"])}, change))
         cat_str = ", ".join(
             item["categories"]) if item["categories"] else "none"
         tag_str = ", ".join(item["tags"][:3]) + \
             ("..." if len(item["tags"]) > 3 else "")
         print(f"[OK] {item['title'][:50]} → [{cat_str}] | {tag_str}")
+        delta.update(category_stats.category_delta(
+            item.get("old_categories"), item["categories"]))
+
+    if ops:
+        coll.bulk_write(ops, ordered=False)
+
+    # Keep the materialized category counts in step with the new tags.
+    # The caller bumps the corpus generation: once per batch would flush
+    # the API caches and rebuild its indexes every few seconds of a run.
+    category_stats.apply_delta(delta)
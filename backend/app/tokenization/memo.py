@@ -0,0 +1,48 @@
+# app/tokenization/memo.py
+"""
+LLM tagging results memoized by tagging fingerprint (llm_local.tagging_fingerprint).
+
+llm_tag_memo holds one document per fingerprint,
+    {_id: <fingerprint>, categories: [...], tags: [...], version: <LLM_VERSION>}
+so a post reposted under another source or url is only sent to the LLM
+once. The fingerprint includes LLM_VERSION, so entries of an older
+prompt or model are never hit.
+"""
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from pymongo import UpdateOne
+
+from app.services.mongo import get_collection
+from app.tokenization.llm_local import LLM_VERSION
+
+MEMO_COLLECTION = "llm_tag_memo"
+
+Tokens = Tuple[List[str], List[str]]
+
+
+def lookup(fingerprints: Iterable[str]) -> Dict[str, Tokens]:
+    """(categories, tags) of every memoized fingerprint among `fingerprints`."""
+    fingerprints = list(set(fingerprints))
+    if not fingerprints:
+        return {}
+    cursor = get_collection(MEMO_COLLECTION).find(
+        {"_id": {"$in": fingerprints}}, {"categories": 1, "tags": 1})
+    return {doc["_id"]: (doc.get("categories") or [], doc.get("tags") or [])
+            for doc in cursor}
+
+
+def store(results: Dict[str, Tokens]) -> None:
+    """Memoize fresh LLM results, one bulk write."""
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"_id": fp},
+            {"$set": {"categories": categories, "tags": tags,
+                      "version": LLM_VERSION, "updated_at": now}},
+            upsert=True,
+        )
+        for fp, (categories, tags) in results.items()
+    ]
+    if ops:
+        get_collection(MEMO_COLLECTION).bulk_write(ops, ordered=False)
@@ -1,73 +1,368 @@
 # app/tokenization/pipeline.py
-from typing import Optional, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Optional, Dict, Any, Callable, List, Tuple
+import time
 import urllib.parse
 
 from bson import ObjectId
+from pymongo.errors import CursorNotFound
 
 from app.models import Hack
+from app.services.corpus import bump_generation
 from app.services.mongo import get_collection
 
-from app.tokenization.config import HACKS_COLLECTION_NAME
-from app.tokenization.llm_local import tag_hack_with_llm
+from app.tokenization import memo
+from app.tokenization.checkpoint import Checkpoint, Watermark
+from app.tokenization.config import (
+    HACKS_COLLECTION_NAME,
+    TAGGING_DOCS_PER_PROMPT,
+    TAGGING_GENERATION_BUMP_SECONDS,
+    TAGGING_RULE_CONFIDENCE,
+    TAGGING_WORKERS,
+)
+from app.tokenization.llm_local import (
+    TAGGING_VERSION,
+    _commit_batch,
+    tag_hack_with_llm,
+    tag_hacks_with_llm_batch,
+    tagging_fingerprint,
+)
+from app.tokenization.rules import tag_hack_with_rules
 
+# Hacks without categories or tags yet (skip_existing)
+MISSING_TOKENS_QUERY = {
+    "$or": [
+        {"categories": {"$exists": False}},
+        {"categories": []},
+        {"tags": {"$exists": False}},
+        {"tags": []},
+    ]
+}
 
-def _iter_hacks_needing_tokens(limit: Optional[int] = None):
+
+def _selection_query(skip_existing: bool = False) -> Dict[str, Any]:
+    """Candidate hacks; _is_due decides which of them are tagged."""
+    return MISSING_TOKENS_QUERY if skip_existing else {}
+
+
+def _is_due(doc: Dict[str, Any], full: bool = False) -> bool:
+    """
+    Whether a hack needs tagging. Every tagged hack stores the
+    TAGGING_VERSION it was tagged with (llm_version) and the
+    tagging_fingerprint of the text it was tagged from (llm_fingerprint).
+    A hack is due when it was never tagged, was tagged by an older
+    prompt/model/rules, or its title/content changed since, whoever
+    edited it. The fingerprint is a hash computed here, not in Mongo,
+    so every candidate is read. Hacks rewritten without a text change
+    (build_hacks_all, which also unsets llm_version) get their tags
+    back from the memo, not the LLM.
     """
-    Yield Mongo
+    if full or doc.get("llm_version") != TAGGING_VERSION:
+        return True
+    return doc.get("llm_fingerprint") != tagging_fingerprint(_doc_to_hack(doc))
+
+
+def _run_id(skip_existing: bool, full: bool) -> str:
+    """Checkpoint key: runs with the same selection resume each other."""
+    mode = "full" if full else "incremental"
+    if skip_existing:
+        mode += "-missing"
+    return f"{HACKS_COLLECTION_NAME}:{TAGGING_VERSION}:{mode}"
+
+
+def _iter_hacks_needing_tokens(
+    limit: Optional[int] = None,
+    skip_existing: bool = False,
+    full: bool = False,
+    after_id: Optional[ObjectId] = None,
+):
+    """
+    Yield the Mongo documents of hacks due for tagging (_is_due) in
+    _id order, starting after `after_id`, with relative reddit image
+    URLs made absolute. A cursor killed by the server mid-run (idle
+    session timeout despite no_cursor_timeout) is reopened after the
+    last yielded _id.
     """
     coll = get_collection(HACKS_COLLECTION_NAME)
 
-    cursor = coll.find({}, no_cursor_timeout=True)
+    yielded = 0
+    while True:
+        if limit is not None and yielded >= limit:
+            return
+        query = _selection_query(skip_existing)
+        if after_id is not None:
+            query = {"$and": [query, {"_id": {"$gt": after_id}}]}
+        cursor = coll.find(query, no_cursor_timeout=True).sort("_id", 1)
 
-    if limit is not None:
-        cursor = cursor.limit(limit)
+        try:
+            for doc in cursor:
+                # Read past, so a reopened cursor skips it too
+                after_id = doc["_id"]
+                if not _is_due(doc, full):
+                    continue
+                image = doc.get("image_url")
+                if isinstance(image, str) and image.startswith("/"):
+                    doc["image_url"] = urllib.parse.urljoin(
+                        "https://www.reddit.com", image)
 
-    for doc in cursor:
-        image = doc.get("image_url")
-        if isinstance(image, str) and image.startswith("/"):
-            doc["image_url"] = urllib.parse.urljoin(
-                "https://www.reddit.com", image)
+                yielded += 1
+                yield doc
+                if limit is not None and yielded >= limit:
+                    return
+            return
+        except CursorNotFound:
+            print(f"[WARN] Cursor expired after {after_id}; reopening")
+        finally:
+            cursor.close()
 
-        yield doc
 
+def _doc_to_hack(doc: Dict[str, Any]) -> Hack:
+    return Hack(
+        id=str(doc["_id"]),
+        source=doc.get("source"),
+        title=doc.get("title", ""),
+        content=doc.get("content"),
+        author=doc.get("author"),
+        date=doc.get("date"),
+        url=doc.get("url"),
+        categories=doc.get("categories") or [],
+        tags=doc.get("tags") or [],
+        image_url=doc.get("image_url"),
+        excerpt=doc.get("excerpt"),
+    )
 
-def run_tokenization(limit: Optional[int] = None) -> None:
+
+def run_tokenization(
+    limit: Optional[int] = None,
+    skip_existing: bool = False,
+    full: bool = False,
+    batch_size: int = 10,
+    resume: bool = True,
+    docs_per_prompt: int = TAGGING_DOCS_PER_PROMPT,
+) -> None:
     """
-    For each Hack document that needs tokens:
+    run_tokenization_concurrent with one LLM request at a time; the
+    same tagging, just without concurrency. For each Hack document that
+    needs tokens:
       - build Hack model
-      - call LLM
-      - update Mongo with categories+tags
+      - take the rule-based tags if they are confident enough
+      - else reuse the memoized result of an identical post, or call LLM
+      - update Mongo with categories+tags (batched, checkpointed)
+    """
+    run_tokenization_concurrent(
+        limit=limit,
+        workers=1,
+        batch_size=batch_size,
+        skip_existing=skip_existing,
+        full=full,
+        resume=resume,
+        docs_per_prompt=docs_per_prompt,
+    )
+
+
+def run_tokenization_concurrent(
+    limit: Optional[int] = None,
+    workers: int = TAGGING_WORKERS,
+    batch_size: int = 10,
+    skip_existing: bool = False,
+    full: bool = False,
+    resume: bool = True,
+    tagger: Callable[[Hack], Tuple[List[str], List[str]]] = tag_hack_with_llm,
+    docs_per_prompt: int = TAGGING_DOCS_PER_PROMPT,
+) -> None:
+    """
+    Tag hacks with up to `workers` LLM requests in flight, each for up
+    to `docs_per_prompt` hacks (tag_hacks_with_llm_batch; hacks the
+    batched answer misses are retried one by one with `tagger`).
+
+    The calling thread reads the cursor and writes finished batches
+    while the pool threads wait on Ollama, so Mongo I/O overlaps the LLM
+    calls. Each pool thread keeps one keep-alive connection to Ollama.
+    Hacks the rules tag with at least TAGGING_RULE_CONFIDENCE (rules.py)
+    are not sent to the LLM at all. Hacks whose tagging fingerprint is
+    memoized, or already in flight for an identical post, are not sent
+    to the LLM again. When the LLM fails, the hack gets the rules' best
+    guess, tagged_by "rules" but without llm_version, so the next run
+    sends it to the LLM again; only LLM results are memoized.
+
+    Progress is checkpointed after every commit (checkpoint.py); an
+    interrupted run with the same selection continues where it stopped
+    unless resume is False.
+
+    Args:
+        limit: Maximum number of hacks to process
+        workers: Concurrent LLM requests
+        batch_size: Tagged hacks per Mongo commit
+        skip_existing: If True, skip hacks that already have categories/tags
+        full: Re-tag hacks already tagged with the current prompt/model
+        resume: Continue an interrupted run instead of starting over
+        tagger: LLM only, Hack -> (categories, tags), ([], []) on failure
+        docs_per_prompt: Hacks per LLM request
     """
     coll = get_collection(HACKS_COLLECTION_NAME)
+    checkpoint = Checkpoint(_run_id(skip_existing, full))
+    state = checkpoint.load() if resume else None
+    stats = {"processed": 0, "successful": 0, "failed": 0, "reused": 0, "rules": 0}
+    after_id = None
+    if state is not None:
+        after_id = state.get("last_id")
+        stats.update(state.get("stats") or {})
+        print(f"Resuming {checkpoint.run_id} after _id {after_id} "
+              f"({stats['processed']} hacks done before)")
+    else:
+        checkpoint.start()
 
+    docs = _iter_hacks_needing_tokens(
+        limit=limit, skip_existing=skip_existing, full=full, after_id=after_id)
+    query = _selection_query(skip_existing)
+    if after_id is not None:
+        query = {"$and": [query, {"_id": {"$gt": after_id}}]}
+    # Upper bound: which candidates are due is only known once read
+    total = coll.count_documents(query)
+    if limit is not None:
+        total = min(total, limit)
+    print(f"Checking {total} hacks with {workers} concurrent LLM requests "
+          f"of up to {docs_per_prompt} hacks (tagging version {TAGGING_VERSION})...")
+
+    start = time.time()
     processed = 0
-    for doc in _iter_hacks_needing_tokens(limit=limit):
-        hack = Hack(
-            id=str(doc["_id"]),
-            source=doc.get("source"),
-            title=doc.get("title", ""),
-            content=doc.get("content"),
-            author=doc.get("author"),
-            date=doc.get("date"),
-            url=doc.get("url"),
-            categories=doc.get("categories") or [],
-            tags=doc.get("tags") or [],
-            image_url=doc.get("image_url"),
-            excerpt=doc.get("excerpt"),
-        )
-
-        categories, tags = tag_hack_with_llm(hack)
+    successful = 0
+    failed = 0
+    reused = 0  # results of identical posts (memo or in flight)
+    ruled = 0  # tagged by the rules alone
+    batch = []
+    watermark = Watermark()
+    last_bump = time.time()
 
-        if not categories and not tags:
-            print(f"[SKIP] No tokens generated for {hack.id} ({hack.title})")
-            continue
+    def run_stats() -> Dict[str, int]:
+        return {"processed": stats["processed"] + processed,
+                "successful": stats["successful"] + successful,
+                "failed": stats["failed"] + failed,
+                "reused": stats["reused"] + reused,
+                "rules": stats["rules"] + ruled}
+
+    fresh: Dict[str, Tuple[List[str], List[str]]] = {}   # LLM results to memoize
+    known: Dict[str, Tuple[List[str], List[str]]] = {}   # fingerprint -> result, this run
 
-        coll.update_one(
-            {"_id": ObjectId(hack.id)},
-            {"$set": {"categories": categories, "tags": tags}},
-        )
+    def progress() -> str:
+        rate = processed / max(time.time() - start, 1e-9)
+        return (f"{processed}/{total} ({successful} successful, {failed} failed, "
+                f"{ruled} by rules, {reused} reused) | {rate:.2f} docs/s")
+
+    def finish(hack: Hack, doc: Dict[str, Any], fingerprint: Optional[str],
+               categories: List[str], tags: List[str], tagged_by: str = "llm") -> None:
+        nonlocal processed, failed, ruled
         processed += 1
-        print(
-            f"[OK] {hack.id} | {hack.title[:60]!r} → {categories} | {len(tags)} tags | {tags}")
+        if not categories and not tags:
+            print(f"[SKIP] No tokens for {hack.id} | {hack.title[:50]}")
+            failed += 1
+            watermark.done(doc["_id"])
+            return
+        if tagged_by == "rules":
+            ruled += 1
+        batch.append({
+            "id": hack.id,
+            "categories": categories,
+            "tags": tags,
+            "title": hack.title,
+            "old_categories": doc.get("categories") or [],
+            "fingerprint": fingerprint,
+            "tagged_by": tagged_by,
+            "_id": doc["_id"],
+        })
+
+    def commit(force: bool = False) -> None:
+        nonlocal batch, successful, last_bump
+        if not batch or (len(batch) < batch_size and not force):
+            return
+        memo.store(fresh)
+        fresh.clear()
+        _commit_batch(coll, batch)
+        if time.time() - last_bump >= TAGGING_GENERATION_BUMP_SECONDS:
+            # Let the API drop cached responses built from the old tags
+            bump_generation()
+            last_bump = time.time()
+        successful += len(batch)
+        for item in batch:
+            watermark.done(item["_id"])
+        batch = []
+        checkpoint.save(watermark.advance(), run_stats())
+        print(f"Progress: {progress()}")
+
+    def tag_group(hacks: List[Hack]) -> List[Tuple[List[str], List[str]]]:
+        if len(hacks) == 1:
+            return [tagger(hacks[0])]
+        return tag_hacks_with_llm_batch(hacks, fallback=tagger)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tagger") as pool:
+        pending: Dict[Future, List[str]] = {}  # request -> fingerprints it tags
+        # In-flight fingerprint -> hacks waiting for its result
+        waiting: Dict[str, List[Tuple[Hack, Dict[str, Any]]]] = {}
+        per_request = max(1, docs_per_prompt)
+        exhausted = False
+        while True:
+            # One queued request per worker on top of the running ones,
+            # so a worker never idles while this thread is in Mongo
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = list(islice(docs, workers * per_request))
+                if not chunk:
+                    exhausted = True
+                    break
+                entries = []
+                for doc in chunk:
+                    watermark.read(doc["_id"])
+                    hack = _doc_to_hack(doc)
+                    fp = tagging_fingerprint(hack)
+                    categories, tags, confidence = tag_hack_with_rules(hack)
+                    if confidence >= TAGGING_RULE_CONFIDENCE:
+                        finish(hack, doc, fp, categories, tags, tagged_by="rules")
+                    else:
+                        entries.append((hack, doc, fp))
+                known.update(memo.lookup(
+                    fp for _, _, fp in entries if fp not in known))
+
+                new: List[Tuple[str, Hack]] = []
+                for hack, doc, fp in entries:
+                    if fp in known:
+                        reused += 1
+                        finish(hack, doc, fp, *known[fp])
+                    elif fp in waiting:
+                        reused += 1
+                        waiting[fp].append((hack, doc))
+                    else:
+                        waiting[fp] = [(hack, doc)]
+                        new.append((fp, hack))
+                for i in range(0, len(new), per_request):
+                    group = new[i:i + per_request]
+                    future = pool.submit(tag_group, [hack for _, hack in group])
+                    pending[future] = [fp for fp, _ in group]
+                commit()
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                fps = pending.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"[LLM ERROR] Tagging failed for {len(fps)} hack(s): {e}")
+                    results = [([], [])] * len(fps)
+                for fp, (categories, tags) in zip(fps, results):
+                    if categories or tags:
+                        known[fp] = fresh[fp] = (categories, tags)
+                        for hack, doc in waiting.pop(fp):
+                            finish(hack, doc, fp, categories, tags)
+                        continue
+                    # LLM failed: the rules' best guess, not stamped as final
+                    for hack, doc in waiting.pop(fp):
+                        categories, tags, _ = tag_hack_with_rules(hack)
+                        finish(hack, doc, None, categories, tags, tagged_by="rules")
+            commit()
 
-    print(f"Done. Updated {processed} hacks.")
+    commit(force=True)
+    if processed:
+        bump_generation()
+    checkpoint.finish(run_stats())
+    print(f"\n✓ Done in {time.time() - start:.1f}s! Processed {progress()}")
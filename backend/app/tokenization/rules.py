@@ -0,0 +1,169 @@
+# app/tokenization/rules.py
+"""
+Rule-based tagging, run before the LLM (pipeline.py) and when it fails
+(pipeline.py, llm_local.tag_hack_with_fallback).
+
+One PhraseMatcher finds, in a single pass over the words of the title
+and the start of the content, every IKEA product name (IKEA_PRODUCT_NAMES)
+and category keyword (IKEA_CATEGORY_KEYWORDS). Each hit is evidence for
+a category:
+    keyword in the title       RULE_WEIGHTS["title"]
+    keyword in the content     RULE_WEIGHTS["content"]
+    product of that category   RULE_WEIGHTS["product"] (IKEA_PRODUCT_CATEGORIES)
+combined as 1 - prod(1 - weight). The confidence of a hack is the score
+of its best category, or 0 when no product is named (the tags would
+be too thin). Hacks at or above TAGGING_RULE_CONFIDENCE skip the LLM.
+"""
+import hashlib
+import json
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.models import Hack
+from app.tokenization.config import (
+    IKEA_AMBIGUOUS_PRODUCT_NAMES,
+    IKEA_CATEGORY_KEYWORDS,
+    IKEA_PRODUCT_CATEGORIES,
+    IKEA_PRODUCT_NAMES,
+    TAGGING_RULE_CONFIDENCE,
+)
+
+RULE_WEIGHTS = {"title": 0.7, "content": 0.4, "product": 0.5}
+MIN_CATEGORY_SCORE = 0.5  # weaker categories are left out of the result
+CONTENT_CHARS = 800  # as much content as the LLM is shown
+MAX_CATEGORIES = 3
+MAX_TAGS = 6
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+
+def _fold(text: str) -> str:
+    """Strip diacritics (BESTÅ -> BESTA), keeping case."""
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text)
+                   if not unicodedata.combining(c))
+
+
+def _stem(word: str) -> str:
+    """Lowercase, singular-ish form, so "shelves"/"shelve" and "carts"/"cart" meet."""
+    word = word.lower()
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+class PhraseMatcher:
+    """
+    Leftmost-longest, non-overlapping match of many word phrases at
+    once. Phrases are indexed by their first word, so a text costs one
+    dict lookup per word plus a comparison for the few words that start
+    a phrase, however many phrases there are.
+    """
+
+    def __init__(self, phrases: Iterable[Tuple[str, Any]]):
+        # first stem -> [(all stems, value)], longest first
+        self._index: Dict[str, List[Tuple[Tuple[str, ...], Any]]] = defaultdict(list)
+        for phrase, value in phrases:
+            stems = tuple(_stem(w) for w in _WORD_RE.findall(_fold(phrase)))
+            if stems:
+                self._index[stems[0]].append((stems, value))
+        for candidates in self._index.values():
+            candidates.sort(key=lambda c: -len(c[0]))
+        self._index = dict(self._index)
+
+    def find(self, words: List[str]) -> List[Tuple[int, Any]]:
+        """(word position, value) of each match in `words` (already stemmed)."""
+        index = self._index
+        out = []
+        end = 0
+        for i in [i for i, w in enumerate(words) if w in index]:
+            if i < end:
+                continue  # inside the previous match
+            for stems, value in index[words[i]]:
+                n = len(stems)
+                if n == 1 or tuple(words[i:i + n]) == stems:
+                    out.append((i, value))
+                    end = i + n
+                    break
+        return out
+
+
+_PRODUCT = "product"
+_KEYWORD = "keyword"
+
+
+def _keyword_categories() -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = defaultdict(list)
+    for category, keywords in IKEA_CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            out[keyword].append(category)
+    return dict(out)
+
+
+KEYWORD_CATEGORIES = _keyword_categories()
+_matcher = PhraseMatcher(
+    [(p, (_PRODUCT, p)) for p in IKEA_PRODUCT_NAMES]
+    + [(k, (_KEYWORD, k)) for k in KEYWORD_CATEGORIES]
+)
+
+# Identifies the rules a stored tagging came from (part of TAGGING_VERSION)
+RULES_VERSION = hashlib.sha1(
+    json.dumps([IKEA_PRODUCT_NAMES, sorted(IKEA_AMBIGUOUS_PRODUCT_NAMES),
+                IKEA_PRODUCT_CATEGORIES, IKEA_CATEGORY_KEYWORDS, RULE_WEIGHTS,
+                MIN_CATEGORY_SCORE, CONTENT_CHARS, TAGGING_RULE_CONFIDENCE],
+               sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+def _matches(text: str) -> List[Tuple[str, str]]:
+    """(kind, product or keyword) of every phrase found in `text`."""
+    text = _fold(text)
+    raw = _WORD_RE.findall(text)
+    # _stem inlined: this is the per-word hot loop
+    words = [w[:-1] if len(w) > 3 and w[-1] == "s" and w[-2] != "s" else w
+             for w in _WORD_RE.findall(text.lower())]
+    out = []
+    for i, (kind, value) in _matcher.find(words):
+        if kind == _PRODUCT and value in IKEA_AMBIGUOUS_PRODUCT_NAMES:
+            # "LACK table" or "IKEA Lack table", not "lack of space"
+            if not (raw[i].isupper() or (i > 0 and words[i - 1] == "ikea")):
+                continue
+        out.append((kind, value))
+    return out
+
+
+def tag_hack_with_rules(hack: Hack) -> Tuple[List[str], List[str], float]:
+    """
+    Categories, tags and confidence (0-1) of a hack from product names
+    and category keywords in its title and content.
+    """
+    content = (hack.content or hack.excerpt or "")[:CONTENT_CHARS]
+    found = [("title", m) for m in _matches(hack.title or "")]
+    found += [("content", m) for m in _matches(content)]
+
+    miss: Dict[str, float] = defaultdict(lambda: 1.0)  # category -> prod(1 - weight)
+    seen = set()
+    tags: List[str] = []
+    products = False
+    for where, (kind, value) in found:
+        if value not in tags:
+            tags.append(value)
+        if kind == _PRODUCT:
+            products = True
+            evidence = [(IKEA_PRODUCT_CATEGORIES.get(value), "product")]
+        else:
+            evidence = [(c, where) for c in KEYWORD_CATEGORIES[value]]
+        for category, weight in evidence:
+            # Each product/keyword counts once per category
+            if category is None or (category, value) in seen:
+                continue
+            seen.add((category, value))
+            miss[category] *= 1.0 - RULE_WEIGHTS[weight]
+
+    scores = sorted(((1.0 - m, c) for c, m in miss.items()), reverse=True)
+    categories = [c for score, c in scores if score >= MIN_CATEGORY_SCORE][:MAX_CATEGORIES]
+    confidence = scores[0][0] if scores and products else 0.0
+    return categories, tags[:MAX_TAGS], round(confidence, 3)
@@ -1,6 +1,9 @@
+import base64
+import json
+
 from bson import ObjectId
-from typing import Any, Dict
-from app.models import Hack
+from typing import Any, Dict, Iterable
+from app.models import Hack, iso_date
 
 def mongo_doc_to_hack(doc: Dict[str, Any]) -> Hack:
     return Hack(
@@ -15,4 +18,42 @@ def mongo_doc_to_hack(doc: Dict[str, Any]) -> Hack:
         tags=doc.get("tags") or [],
         image_url=doc.get("image_url"),
         excerpt=doc.get("excerpt"),
+        score=doc.get("score"),
     )
+
+
+
+def mongo_doc_to_hit(doc: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Plain-dict search hit with id, score and `fields`, for the fast
+    (non-pydantic) response path. Accepts raw Mongo documents and
+    Atlas-projected ones (string "id").
+    """
+    hit = {"id": doc["id"] if "id" in doc else str(doc["_id"])}
+    for field in fields:
+        value = doc.get(field)
+        if value is None and field in ("categories", "tags"):
+            value = []
+        elif field == "date":
+            value = iso_date(value)
+        hit[field] = value
+    hit["score"] = doc.get("score")
+    return hit
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Pack pagination state into an opaque, URL-safe token."""
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Inverse of encode_cursor; raises ValueError on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        state = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
@@ -0,0 +1,80 @@
+"""
+Compare two bench.run result files, per concurrency level and endpoint.
+Exits with status 1 when p95 latency grew, or throughput fell, by more
+than --threshold percent, so it can gate a CI job. Run from the backend root:
+
+python -m bench.compare base.json new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _rows(report: Dict[str, Any]) -> Dict[Tuple[int, str], Dict[str, Any]]:
+    rows = {}
+    for level in report["levels"]:
+        rows[(level["concurrency"], "all")] = level
+        for kind, summary in level["endpoints"].items():
+            rows[(level["concurrency"], kind)] = summary
+    return rows
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100.0 if old else 0.0
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the comparison table and return the regressions found."""
+    old_rows, new_rows = _rows(base), _rows(new)
+    regressions = []
+    print(f"{'c':>4}  {'endpoint':<18} {'p50 ms':>16} {'p95 ms':>16} "
+          f"{'p99 ms':>16} {'req/s':>18}")
+    for key in sorted(old_rows.keys() & new_rows.keys()):
+        old, cur = old_rows[key], new_rows[key]
+        cells = []
+        for p in ("p50", "p95", "p99"):
+            a, b = old["latency_ms"][p], cur["latency_ms"][p]
+            cells.append(f"{b:>8.2f} ({_change(a, b):+5.0f}%)")
+        a, b = old["throughput_rps"], cur["throughput_rps"]
+        cells.append(f"{b:>10.1f} ({_change(a, b):+5.0f}%)")
+        print(f"{key[0]:>4}  {key[1]:<18} " + " ".join(cells))
+
+        p95_change = _change(old["latency_ms"]["p95"], cur["latency_ms"]["p95"])
+        if p95_change > threshold:
+            regressions.append(f"c={key[0]} {key[1]}: p95 {p95_change:+.0f}%")
+        # Per-endpoint throughput follows the mix, only the total counts
+        if key[1] == "all" and _change(a, b) < -threshold:
+            regressions.append(f"c={key[0]} all: throughput {_change(a, b):+.0f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base", help="Results of the baseline commit.")
+    parser.add_argument("new", help="Results of the commit under test.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Allowed p95 / throughput change in percent (default: 10).",
+    )
+    args = parser.parse_args()
+
+    base, new = _load(args.base), _load(args.new)
+    print(f"base: {base['meta'].get('commit')}  new: {new['meta'].get('commit')}")
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
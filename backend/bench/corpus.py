@@ -0,0 +1,140 @@
+# bench/corpus.py
+"""
+Benchmark corpus for hacks_all: synthetic hacks from a fixed seed, or a
+fixture file such as the NDJSON written by GET /api/search/export.
+
+The synthetic documents have the shape the crawler produces (title,
+content, excerpt, categories, tags, source, BSON date, ...) with a
+Zipf-like word distribution, so index sizes and posting lengths grow
+with --docs roughly the way the real corpus does.
+"""
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+from bson import ObjectId
+
+from app.tokenization.config import IKEA_HACKS_CATEGORIES, IKEA_PRODUCT_NAMES
+
+SOURCES = ("ikeahackers", "reddit", "apartmenttherapy", "instructables")
+
+FURNITURE = (
+    "shelf", "bench", "table", "desk", "cabinet", "dresser", "bookcase",
+    "wardrobe", "nightstand", "sideboard", "headboard", "island", "cart",
+    "vanity", "console", "stool", "lamp", "planter", "mirror", "bed",
+)
+ACTIONS = (
+    "painted", "upcycled", "built", "turned", "mounted", "stained",
+    "wrapped", "raised", "converted", "combined", "cut", "sanded",
+)
+ROOMS = (
+    "kitchen", "bedroom", "hallway", "entryway", "office", "nursery",
+    "bathroom", "living room", "balcony", "garage", "closet", "studio",
+)
+FILLER = (
+    "wood", "legs", "doors", "drawers", "plywood", "veneer", "brass",
+    "handles", "storage", "baskets", "cane", "oak", "pine", "white",
+    "black", "walnut", "hinges", "screws", "glue", "primer", "paint",
+    "budget", "weekend", "project", "easy", "renter", "friendly", "small",
+    "space", "modern", "rustic", "boho", "minimal", "scandinavian",
+    "floating", "wall", "hidden", "custom", "top", "cushion", "fabric",
+)
+
+FIRST_DATE = datetime(2012, 1, 1, tzinfo=timezone.utc)
+DATE_SPAN_DAYS = 13 * 365
+
+
+class _Zipf:
+    """Draws from a word list with probability ~ 1 / rank."""
+
+    def __init__(self, words, rng: random.Random):
+        self.words = list(words)
+        self.weights = [1.0 / (i + 1) for i in range(len(self.words))]
+        self.rng = rng
+
+    def draw(self, n: int) -> List[str]:
+        return self.rng.choices(self.words, weights=self.weights, k=n)
+
+
+def synthetic_hacks(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield n hack documents; the same (n, seed) yields the same corpus."""
+    rng = random.Random(seed)
+    products = [p.upper() for p in IKEA_PRODUCT_NAMES]
+    vocabulary = _Zipf(
+        [w for pair in zip(FURNITURE, ACTIONS) for w in pair]
+        + list(FILLER) + [p.lower() for p in products], rng)
+    categories = _Zipf([c.replace("&amp;", "&") for c in IKEA_HACKS_CATEGORIES], rng)
+
+    for i in range(n):
+        product = rng.choice(products)
+        furniture = rng.choice(FURNITURE)
+        title = (f"{product} {furniture} {rng.choice(ACTIONS)} into a "
+                 f"{rng.choice(ROOMS)} {rng.choice(FURNITURE)}")
+        words = vocabulary.draw(rng.randint(80, 600))
+        content = " ".join(words)
+        yield {
+            "_id": ObjectId(f"{i:024x}"),
+            "title": title,
+            "content": f"{title}. {content}",
+            "excerpt": content[:200],
+            "author": f"author{rng.randint(1, max(1, n // 20))}",
+            "date": FIRST_DATE + timedelta(days=rng.randrange(DATE_SPAN_DAYS)),
+            "url": f"https://example.com/hacks/{i}",
+            "categories": sorted(set(categories.draw(rng.randint(1, 3)))),
+            "tags": sorted({product, furniture, *vocabulary.draw(2)}),
+            "image_url": f"https://example.com/img/{i}.jpg",
+            "source": rng.choice(SOURCES),
+        }
+
+
+def fixture_hacks(path: str) -> Iterator[Dict[str, Any]]:
+    """Read hacks from a .json array or NDJSON file (e.g. /export output)."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            docs = json.load(f)
+        else:
+            docs = (json.loads(line) for line in f if line.strip())
+        for doc in docs:
+            doc = dict(doc)
+            hack_id = doc.pop("id", None) or doc.get("_id")
+            if isinstance(hack_id, str) and ObjectId.is_valid(hack_id):
+                doc["_id"] = ObjectId(hack_id)
+            if isinstance(doc.get("date"), str):
+                try:
+                    doc["date"] = datetime.fromisoformat(doc["date"].replace("Z", "+00:00"))
+                except ValueError:
+                    pass
+            yield doc
+
+
+def load(db, docs, reset: bool = False, batch_size: int = 1000) -> int:
+    """
+    Insert docs into db.hacks_all and rebuild the derived collections.
+    Refuses to touch a non-empty hacks_all unless reset is set.
+    """
+    from app.services import category_stats, corpus
+
+    hacks = db["hacks_all"]
+    if hacks.estimated_document_count():
+        if not reset:
+            raise SystemExit(
+                f"[bench] {db.name}.hacks_all is not empty; pass --reset to replace it")
+        hacks.drop()
+        db[category_stats.CATEGORY_STATS_COLLECTION].drop()
+
+    total = 0
+    batch: List[Dict[str, Any]] = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            hacks.insert_many(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        hacks.insert_many(batch)
+        total += len(batch)
+
+    category_stats.rebuild(db)
+    corpus.bump_generation(db)
+    return total
@@ -0,0 +1,108 @@
+"""
+Replay a query log (QUERY_LOG_PATH, see app/services/query_log.py)
+against a running server at fixed concurrency levels. Writes the same
+JSON as bench.run, so bench.compare works on replays too. Run from the
+backend root:
+
+python -m bench.replay data/query_log.ndjson --target http://localhost:8000
+python -m bench.replay data/query_log.ndjson --top 500 --concurrency 8,64 --out replay.json
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from urllib.parse import quote
+
+import orjson
+
+from bench.run import DEFAULT_CONCURRENCY, git_revision, run_level
+from bench.workload import API, Request
+
+
+def to_request(entry: Dict[str, Any]) -> Request:
+    """HTTP request for one logged {"type", "params"} entry."""
+    params = dict(entry.get("params") or {})
+    kind = entry["type"]
+    if kind == "search":
+        return Request(kind, "GET", f"{API}/", params)
+    if kind == "category":
+        name = quote(str(params.pop("category_name")), safe="")
+        return Request(kind, "GET", f"{API}/categories/{name}/hacks", params)
+    if kind == "similar":
+        hack_id = quote(str(params.pop("hack_id")), safe="")
+        return Request(kind, "GET", f"{API}/similar/{hack_id}", params)
+    raise ValueError(f"Unknown logged request type: {kind}")
+
+
+def load_requests(path: str, top: int, limit: int) -> List[Request]:
+    from app.services import query_log
+
+    if top:
+        entries = query_log.top_queries(top, path=path, window=limit)
+    else:
+        entries = query_log.read_entries(path, window=limit)
+    return [to_request(e) for e in entries]
+
+
+async def _replay(args, requests: List[Request]) -> List[Dict[str, Any]]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    levels = []
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout,
+                                 limits=limits) as client:
+        for concurrency in args.concurrency:
+            level = await run_level(client, requests, concurrency)
+            levels.append(level)
+            lat = level["latency_ms"]
+            print(f"[replay] c={concurrency:<4} {level['throughput_rps']:>9.1f} req/s  "
+                  f"p50 {lat['p50']:.1f}ms  p95 {lat['p95']:.1f}ms  p99 {lat['p99']:.1f}ms  "
+                  f"errors {level['errors']}", file=sys.stderr)
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query log against the API.")
+    parser.add_argument("log", help="Query log file (NDJSON).")
+    parser.add_argument("--target", default="http://localhost:8000",
+                        help="Base URL of the server (default: http://localhost:8000).")
+    parser.add_argument("--limit", type=int, default=100000,
+                        help="Replay the last N logged requests (default: 100000).")
+    parser.add_argument("--top", type=int, default=0,
+                        help="Replay only the N most frequent requests instead, once each.")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help=f"Comma-separated concurrency levels (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-request timeout in seconds (default: 30).")
+    parser.add_argument("--out", default=None,
+                        help="Write the JSON results here (default: stdout).")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    requests = load_requests(args.log, args.top, args.limit)
+    if not requests:
+        raise SystemExit(f"[replay] No requests in {args.log}")
+    print(f"[replay] {len(requests)} requests from {args.log}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.target,
+            "log": args.log,
+            "requests_per_level": len(requests),
+        },
+        "levels": asyncio.run(_replay(args, requests)),
+    }
+    body = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.out:
+        with open(args.out, "wb") as f:
+            f.write(body)
+        print(f"[replay] Wrote {args.out}", file=sys.stderr)
+    else:
+        sys.stdout.write(body.decode() + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+API benchmark: load a corpus, replay the query mix in bench/workload.py
+at fixed concurrency levels and report throughput and p50/p95/p99
+latency per endpoint as JSON. Run from the backend root:
+
+python -m bench.run --docs 5000 --concurrency 1,8,32 --out bench.json
+python -m bench.run --mongo uri --docs 20000 --reset          (local mongod at MONGO_URI)
+python -m bench.run --target http://localhost:8000 --requests 2000
+python -m bench.compare base.json bench.json
+
+"""
+import argparse
+import asyncio
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+DEFAULT_CONCURRENCY = "1,8,32"
+
+
+def percentile(values: List[float], p: float) -> float:
+    """p-th percentile (0-100) of sorted values, linearly interpolated."""
+    if not values:
+        return 0.0
+    k = (len(values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def summarize(latencies_ms: List[float], errors: int, elapsed_s: float) -> Dict[str, Any]:
+    values = sorted(latencies_ms)
+    n = len(values) + errors
+    return {
+        "requests": n,
+        "errors": errors,
+        "throughput_rps": round(n / elapsed_s, 2) if elapsed_s else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "mean": round(sum(values) / len(values), 3) if values else 0.0,
+            "max": round(values[-1], 3) if values else 0.0,
+        },
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+# --------------------------------------------------------------- setup --
+
+def _configure_env(args) -> None:
+    """Settings the app reads at import time (app.core.config, mongo)."""
+    if args.mongo == "mock":
+        # Placeholder: the clients are swapped for mongomock before use
+        os.environ["MONGO_URI"] = "mongodb://localhost:1"
+        os.environ["SEARCH_BACKEND"] = "local"  # no $search in the stand-in
+    elif args.backend:
+        os.environ["SEARCH_BACKEND"] = args.backend
+    os.environ.setdefault("CORS_ALLOW_ORIGINS", "http://localhost")
+    if args.no_cache:
+        os.environ["CACHE_MAX_ENTRIES"] = "0"
+    # Runs must start cold and leave nothing behind: no startup replay of
+    # an earlier run's queries, no query log written into the tree
+    os.environ["QUERY_LOG_SAMPLE_RATE"] = "0"
+    os.environ["WARMUP_QUERIES"] = "0"
+    if "EMBEDDINGS_DIR" not in os.environ:
+        os.environ["EMBEDDING_BACKEND"] = "hashing"
+        os.environ["EMBEDDINGS_DIR"] = tempfile.mkdtemp(prefix="bench-embeddings-")
+
+
+def _use_mongo_stand_in() -> None:
+    try:
+        import mongomock
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("[bench] --mongo mock needs mongomock and mongomock-motor "
+                         "(pip install -r bench/requirements.txt)")
+    from app.services import mongo
+
+    client = mongomock.MongoClient()
+    mongo._db = client[mongo.MONGO_DB_NAME]
+    mongo._async_db = AsyncMongoMockClient(mock_mongo_client=client)[mongo.MONGO_DB_NAME]
+
+
+def _prepare_corpus(args, embeddings: bool) -> None:
+    """
+    Load the corpus and build the offline similarity data for it. A
+    remote server reads its own EMBEDDINGS_DIR, so embeddings are only
+    built for the in-process app.
+    """
+    from app.services import mongo
+    from app.similarity.embeddings import build_embeddings
+    from app.similarity.neighbours import build_neighbours
+    from bench import corpus
+
+    docs = (corpus.fixture_hacks(args.fixture) if args.fixture
+            else corpus.synthetic_hacks(args.docs, seed=args.seed))
+    start = time.perf_counter()
+    n = corpus.load(mongo.get_db(), docs, reset=args.reset or args.mongo == "mock")
+    print(f"[bench] Loaded {n} hacks in {time.perf_counter() - start:.1f}s")
+
+    if embeddings:
+        build_embeddings()
+    try:
+        build_neighbours()
+    except Exception as e:
+        # mongomock has no bulk_write for pymongo 4; similar then falls
+        # back to live moreLikeThis and is skipped unless Atlas is there
+        print(f"[bench] Could not build hack_neighbours: {e}")
+
+
+# ----------------------------------------------------------------- run --
+
+async def _send(client, req) -> Tuple[str, Optional[int], float]:
+    start = time.perf_counter()
+    try:
+        r = await client.request(req.method, req.path, params=req.params, json=req.json)
+        status: Optional[int] = r.status_code
+    except Exception as e:
+        print(f"[bench] {req.kind} {req.path} failed: {e}")
+        status = None
+    return req.kind, status, (time.perf_counter() - start) * 1000.0
+
+
+async def _probe(client, workload) -> Dict[str, str]:
+    """One request per kind; kinds the deployment cannot serve are skipped."""
+    skipped = {}
+    for kind in list(workload.kinds):
+        _, status, _ = await _send(client, workload.build(kind))
+        if status is None or status >= 400:
+            skipped[kind] = f"HTTP {status}" if status else "request failed"
+            workload.kinds.remove(kind)
+    return skipped
+
+
+async def run_level(client, requests, concurrency: int) -> Dict[str, Any]:
+    it = iter(requests)
+    samples: List[Tuple[str, Optional[int], float]] = []
+
+    async def worker():
+        for req in it:
+            samples.append(await _send(client, req))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    by_kind: Dict[str, List[float]] = defaultdict(list)
+    errors_by_kind: Dict[str, int] = defaultdict(int)
+    for kind, status, ms in samples:
+        if status is None or status >= 400:
+            errors_by_kind[kind] += 1
+        else:
+            by_kind[kind].append(ms)
+
+    level = {"concurrency": concurrency, "duration_s": round(elapsed, 3)}
+    level.update(summarize([ms for v in by_kind.values() for ms in v],
+                           sum(errors_by_kind.values()), elapsed))
+    level["endpoints"] = {
+        kind: summarize(by_kind.get(kind, []), errors_by_kind.get(kind, 0), elapsed)
+        for kind in sorted(set(by_kind) | set(errors_by_kind))
+    }
+    return level
+
+
+async def _benchmark(args, client) -> Dict[str, Any]:
+    from bench.workload import CorpusSample, Workload
+
+    sample = await CorpusSample.from_api(client)
+    if not sample.hack_ids:
+        raise SystemExit("[bench] The API returned no hacks; load a corpus first")
+    kinds = args.kinds.split(",") if args.kinds else None
+    workload = Workload(sample, seed=args.seed, kinds=kinds)
+    skipped = await _probe(client, workload)
+    for kind, reason in skipped.items():
+        print(f"[bench] Skipping {kind}: {reason}")
+    if not workload.kinds:
+        raise SystemExit("[bench] No request kind could be served")
+
+    levels = []
+    for concurrency in args.concurrency:
+        if args.warmup:
+            await run_level(client, workload.requests(args.warmup), concurrency)
+        level = await run_level(client, workload.requests(args.requests), concurrency)
+        levels.append(level)
+        lat = level["latency_ms"]
+        print(f"[bench] c={concurrency:<4} {level['throughput_rps']:>9.1f} req/s  "
+              f"p50 {lat['p50']:.1f}ms  p95 {lat['p95']:.1f}ms  p99 {lat['p99']:.1f}ms  "
+              f"errors {level['errors']}")
+    return {"corpus": {"hacks": len(sample.hack_ids), "queries": len(workload.pool)},
+            "skipped": skipped, "levels": levels}
+
+
+async def _run_in_process(args) -> Dict[str, Any]:
+    import httpx
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     timeout=args.timeout) as client:
+            return await _benchmark(args, client)
+
+
+async def _run_remote(args) -> Dict[str, Any]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout,
+                                 limits=limits) as client:
+        return await _benchmark(args, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a query mix against the search API and report latency.")
+    parser.add_argument(
+        "--target", default="inprocess",
+        help="'inprocess' (ASGI app in this process, default) or the base URL of a running server.")
+    parser.add_argument(
+        "--mongo", choices=("mock", "uri"), default="mock",
+        help="mock: in-memory mongomock stand-in (local backend only, default); "
+             "uri: MONGO_URI / MONGO_DB_NAME, e.g. a local mongod.")
+    parser.add_argument("--backend", choices=("local", "atlas"), default=None,
+                        help="SEARCH_BACKEND for --mongo uri (default: from the environment).")
+    parser.add_argument("--docs", type=int, default=2000,
+                        help="Synthetic hacks to load (default: 2000).")
+    parser.add_argument("--fixture", default=None,
+                        help="Load hacks from a .json / NDJSON file instead of generating them.")
+    parser.add_argument("--skip-load", action="store_true",
+                        help="Benchmark the corpus already in MONGO_URI.")
+    parser.add_argument("--reset", action="store_true",
+                        help="Replace a non-empty hacks_all when loading.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the corpus and the request sequence (default: 0).")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help=f"Comma-separated concurrency levels (default: {DEFAULT_CONCURRENCY}).")
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="Measured requests per concurrency level (default: 1000).")
+    parser.add_argument("--warmup", type=int, default=100,
+                        help="Unmeasured requests before each level (default: 100).")
+    parser.add_argument("--kinds", default=None,
+                        help="Comma-separated request kinds to replay (default: the full mix).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the response cache (in-process only).")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="Per-request timeout in seconds (default: 30).")
+    parser.add_argument("--out", default=None,
+                        help="Write the JSON results here (default: stdout).")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    remote = args.target != "inprocess"
+    if remote and args.mongo == "mock" and not args.skip_load:
+        raise SystemExit("[bench] Loading a remote server's corpus needs --mongo uri")
+    if not remote:
+        _configure_env(args)
+        if args.mongo == "mock":
+            _use_mongo_stand_in()
+    if not args.skip_load:
+        _prepare_corpus(args, embeddings=not remote)
+
+    results = asyncio.run(_run_remote(args) if remote else _run_in_process(args))
+
+    from app.core import config
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "target": args.target,
+            "mongo": args.mongo,
+            "search_backend": None if remote else config.SEARCH_BACKEND,
+            "cache": None if remote else config.CACHE_MAX_ENTRIES > 0,
+            "seed": args.seed,
+            "requests_per_level": args.requests,
+            "warmup": args.warmup,
+        },
+        **results,
+    }
+    body = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.out:
+        with open(args.out, "wb") as f:
+            f.write(body)
+        print(f"[bench] Wrote {args.out}")
+    else:
+        sys.stdout.write(body.decode() + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# bench/workload.py
+"""
+Query mix replayed against /api/search.
+
+Request kinds and their share of the traffic are listed in MIX. Query
+terms are drawn from the served corpus (titles, tags, categories, ids)
+with a skewed popularity, so the response cache sees a realistic mix of
+repeats and one-offs. The sequence only depends on the seed and the
+corpus, so two runs against the same corpus replay the same requests.
+"""
+import random
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# kind -> relative weight
+MIX: Dict[str, int] = {
+    "search": 30,
+    "search_page2": 5,
+    "search_facets": 6,
+    "search_filtered": 5,
+    "search_highlight": 5,
+    "search_typo": 3,
+    "search_hybrid": 3,
+    "suggest": 20,
+    "semantic": 3,
+    "similar": 4,
+    "similar_semantic": 2,
+    "categories_top": 3,
+    "category_hacks": 6,
+    "batch": 3,
+    "export": 1,
+    "cache_stats": 1,
+}
+
+API = "/api/search"
+QUERY_POOL_SIZE = 500
+HIT_FIELDS = "title,excerpt,url,image_url,categories,source"
+
+
+class Request:
+    def __init__(self, kind: str, method: str, path: str,
+                 params: Optional[Dict[str, Any]] = None,
+                 json: Optional[Dict[str, Any]] = None):
+        self.kind = kind
+        self.method = method
+        self.path = path
+        self.params = params or {}
+        self.json = json
+
+
+class CorpusSample:
+    """What the workload needs to know about the served corpus."""
+
+    def __init__(self, queries: List[str], hack_ids: List[str],
+                 categories: List[str], sources: List[str]):
+        self.queries = queries
+        self.hack_ids = hack_ids
+        self.categories = categories
+        self.sources = sources
+
+    @classmethod
+    async def from_api(cls, client, limit: int = 5000) -> "CorpusSample":
+        """Sample the corpus through the API itself (/export, /categories/top)."""
+        queries: List[str] = []
+        ids: List[str] = []
+        sources = set()
+        params = {"fields": "title,tags,source"}
+        async with client.stream("GET", f"{API}/export", params=params) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                hit = orjson.loads(line)
+                ids.append(hit["id"])
+                words = (hit.get("title") or "").split()
+                if words:
+                    queries.append(" ".join(words[:2]).lower())
+                    queries.append(words[-1].lower())
+                queries.extend(t.lower() for t in (hit.get("tags") or [])[:2]
+                               if isinstance(t, str))
+                if hit.get("source"):
+                    sources.add(hit["source"])
+                if len(ids) >= limit:
+                    break
+        r = await client.get(f"{API}/categories/top", params={"limit": 20})
+        r.raise_for_status()
+        categories = [c["category"] for c in r.json()]
+        # First-seen order, so the pool does not depend on set hashing
+        queries = list(dict.fromkeys(q for q in queries if q))
+        return cls(queries=queries, hack_ids=ids, categories=categories,
+                   sources=sorted(sources))
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+class Workload:
+    def __init__(self, sample: CorpusSample, seed: int = 0,
+                 kinds: Optional[List[str]] = None):
+        self.sample = sample
+        self.rng = random.Random(seed)
+        pool_rng = random.Random(seed)
+        pool = list(sample.queries)
+        pool_rng.shuffle(pool)
+        self.pool = pool[:QUERY_POOL_SIZE] or ["kallax"]
+        self.pool_weights = [1.0 / (i + 1) for i in range(len(self.pool))]
+        self.kinds = [k for k in MIX if kinds is None or k in kinds]
+
+    def _query(self) -> str:
+        return self.rng.choices(self.pool, weights=self.pool_weights)[0]
+
+    def _hack_id(self) -> str:
+        return self.rng.choice(self.sample.hack_ids)
+
+    def _category(self) -> str:
+        return self.rng.choice(self.sample.categories or ["Kitchen"])
+
+    def build(self, kind: str) -> Request:
+        q = self._query
+        if kind == "search":
+            return Request(kind, "GET", f"{API}/", {"query": q(), "fields": HIT_FIELDS})
+        if kind == "search_page2":
+            return Request(kind, "GET", f"{API}/", {"query": q(), "page": 2})
+        if kind == "search_facets":
+            return Request(kind, "GET", f"{API}/", {"query": q(), "facets": "true"})
+        if kind == "search_filtered":
+            params = {"query": q(), "date_from": "2018-01-01"}
+            if self.sample.sources:
+                params["source"] = self.rng.choice(self.sample.sources)
+            return Request(kind, "GET", f"{API}/", params)
+        if kind == "search_highlight":
+            return Request(kind, "GET", f"{API}/",
+                           {"query": q(), "fields": HIT_FIELDS, "highlight": "true"})
+        if kind == "search_typo":
+            words = [_typo(w, self.rng) for w in q().split()]
+            return Request(kind, "GET", f"{API}/",
+                           {"query": " ".join(words), "autocorrect": "true"})
+        if kind == "search_hybrid":
+            return Request(kind, "GET", f"{API}/", {"query": q(), "mode": "hybrid"})
+        if kind == "suggest":
+            text = q()
+            return Request(kind, "GET", f"{API}/suggest",
+                           {"query": text[:self.rng.randint(1, len(text))]})
+        if kind == "semantic":
+            return Request(kind, "GET", f"{API}/semantic", {"query": q()})
+        if kind == "similar":
+            return Request(kind, "GET", f"{API}/similar/{self._hack_id()}", {})
+        if kind == "similar_semantic":
+            return Request(kind, "GET", f"{API}/similar/{self._hack_id()}",
+                           {"mode": "semantic"})
+        if kind == "categories_top":
+            return Request(kind, "GET", f"{API}/categories/top", {})
+        if kind == "category_hacks":
+            return Request(kind, "GET", f"{API}/categories/{self._category()}/hacks",
+                           {"page": self.rng.randint(1, 3)})
+        if kind == "batch":
+            return Request(kind, "POST", f"{API}/batch", json={"requests": [
+                {"type": "search", "params": {"query": q()}},
+                {"type": "category", "params": {"category_name": self._category()}},
+                {"type": "top_categories", "params": {}},
+            ]})
+        if kind == "export":
+            return Request(kind, "GET", f"{API}/export",
+                           {"query": q(), "fields": "title,url"})
+        if kind == "cache_stats":
+            return Request(kind, "GET", f"{API}/cache/stats", {})
+        raise ValueError(f"Unknown request kind: {kind}")
+
+    def requests(self, n: int) -> List[Request]:
+        """n requests drawn from MIX (restricted to self.kinds)."""
+        weights = [MIX[k] for k in self.kinds]
+        return [self.build(k) for k in self.rng.choices(self.kinds, weights=weights, k=n)]
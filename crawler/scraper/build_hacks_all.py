@@ -6,6 +6,8 @@ from typing import List
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from scraper.dates import normalize_date_field, unset_stale_date_raw
+
 # Load env vars from .env in this folder (MONGO_URI, MONGO_DB_NAME)
 load_dotenv()
 
@@ -18,6 +20,12 @@ if not MONGO_URI:
 client = MongoClient(MONGO_URI)
 db = client[MONGO_DB_NAME]
 
+# Generation counter read by the backend (see backend/app/services/corpus.py)
+CORPUS_META_COLLECTION = "corpus_meta"
+CORPUS_META_ID = "hacks_all"
+# Per-category counts read by the API (see backend/app/services/category_stats.py)
+CATEGORY_STATS_COLLECTION = "category_stats"
+
 
 def get_source_collections() -> List[str]:
     """
@@ -31,6 +39,27 @@ def get_source_collections() -> List[str]:
     ]
 
 
+def rebuild_category_stats():
+    """
+    Recompute category_stats ({_id: category, count}) from hacks_all.
+    This is backend/app/services/category_stats.py::rebuild, which the
+    crawler cannot import (it does not install the backend's packages);
+    change both together. Rows are replaced in place because $out would
+    drop the {count: -1} index the API reads the top categories with.
+    """
+    stats = db[CATEGORY_STATS_COLLECTION]
+    rows = list(db["hacks_all"].aggregate([
+        {"$project": {"categories": {"$setUnion": [
+            {"$ifNull": ["$categories", []]}, []]}}},
+        {"$unwind": "$categories"},
+        {"$group": {"_id": "$categories", "count": {"$sum": 1}}},
+    ]))
+    for row in rows:
+        stats.replace_one({"_id": row["_id"]}, row, upsert=True)
+    stats.delete_many({"_id": {"$nin": [row["_id"] for row in rows]}})
+    stats.create_index([("count", -1)])
+
+
 def build_hacks_all(drop_existing: bool = True):
     """
     Build (or rebuild) the hacks_all collection by merging all hacks_* collections.
@@ -69,14 +98,33 @@ def build_hacks_all(drop_existing: bool = True):
                 # If there's no URL, we skip; it's a broken document for our use case.
                 continue
 
+            # Older crawls stored dates as text; store BSON dates
+            normalize_date_field(doc)
+
             # Natural key: (url, source)
             key = {"url": url, "source": doc["source"]}
 
-            # Upsert into hacks_all
-            result = target.update_one(key, {"$set": doc}, upsert=True)
+            # Upsert into hacks_all. The crawled categories/tags replace
+            # the LLM ones, so mark the hack for the backend tagging
+            # pipeline; it re-applies memoized tags unless the text changed
+            unset = {"llm_version": "", **unset_stale_date_raw(doc)}
+            result = target.update_one(
+                key, {"$set": doc, "$unset": unset}, upsert=True)
             if result.upserted_id is not None:
                 total_inserted += 1
 
+    # drop() took the API's indexes with it; re-create the one category
+    # pages need for keyset paging (see backend/app/services/mongo.py)
+    target.create_index([("categories", 1), ("_id", 1)])
+
+    # Rebuild materialized per-category counts read by the API
+    print("Rebuilding category_stats...")
+    rebuild_category_stats()
+
+    # Tell running API instances that hacks_all changed
+    db[CORPUS_META_COLLECTION].update_one(
+        {"_id": CORPUS_META_ID}, {"$inc": {"generation": 1}}, upsert=True)
+
     print(f"Done. Total new docs inserted into hacks_all: {total_inserted}")
     print(
         f"hacks_all now has {db['hacks_all'].count_documents({})} documents.")
@@ -0,0 +1,90 @@
+# scraper/scraper/dates.py
+"""
+Normalize the free-form dates the spiders scrape to UTC datetimes,
+stored in Mongo as BSON dates (so Atlas can range-filter on `date`).
+
+Handles ISO 8601 (Reddit, <time datetime="...">, article:published_time)
+and the usual English <time> texts such as "March 5, 2021" or "5 Mar 2021".
+"""
+import re
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+_TEXT_FORMATS = (
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %d %Y",
+    "%b %d %Y",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%d.%m.%Y",
+)
+# No "%d/%m/%Y" or "%m/%d/%Y": nothing tells 03/04/2019 apart, so such
+# dates are kept in date_raw rather than guessed
+
+# "5th", "22nd" -> "5", "22"
+_ORDINAL_RE = re.compile(r"(\d{1,2})(st|nd|rd|th)\b", re.IGNORECASE)
+
+
+def parse_date(value: Any) -> Optional[datetime]:
+    """
+    Return `value` as a UTC datetime, or None if it cannot be parsed.
+    Naive inputs are taken to be UTC.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        parsed = None
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            text = _ORDINAL_RE.sub(r"\1", text)
+            for fmt in _TEXT_FORMATS:
+                try:
+                    parsed = datetime.strptime(text, fmt)
+                    break
+                except ValueError:
+                    continue
+        if parsed is None:
+            return None
+    else:
+        return None
+
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def normalize_date_field(doc: dict) -> None:
+    """
+    Replace doc["date"] with a datetime in place. Unparseable values
+    are moved to doc["date_raw"] so nothing scraped is lost; a date_raw
+    left by an earlier failure is dropped once the date parses (writers
+    $unset it when it is absent, see unset_stale_date_raw).
+    """
+    raw = doc.get("date")
+    if raw is None:
+        return
+    parsed = raw if isinstance(raw, datetime) else parse_date(raw)
+    doc["date"] = parsed
+    if parsed is None:
+        doc["date_raw"] = raw
+    else:
+        doc.pop("date_raw", None)
+
+
+def unset_stale_date_raw(doc: dict) -> dict:
+    """
+    $unset clause for an upsert of `doc`: removes a stored date_raw
+    once the document's date has parsed.
+    """
+    if doc.get("date") is not None and "date_raw" not in doc:
+        return {"date_raw": ""}
+    return {}
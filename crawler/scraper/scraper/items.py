@@ -11,7 +11,8 @@ class IkeaHackItem(scrapy.Item):
     title = scrapy.Field()
     content = scrapy.Field()
     author = scrapy.Field()
-    date = scrapy.Field()
+    date = scrapy.Field()       # UTC datetime (see pipelines.DateNormalizationPipeline)
+    date_raw = scrapy.Field()   # scraped date text that could not be parsed
     url = scrapy.Field()
     categories = scrapy.Field()
     tags = scrapy.Field()
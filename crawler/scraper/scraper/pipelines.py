@@ -9,6 +9,20 @@ from itemadapter import ItemAdapter
 import pymongo
 from scrapy.exceptions import NotConfigured
 
+from scraper.dates import normalize_date_field, unset_stale_date_raw
+
+
+class DateNormalizationPipeline:
+    """Store `date` as a UTC datetime (BSON date) instead of scraped text."""
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        raw = adapter.get("date")
+        normalize_date_field(adapter)
+        if raw is not None and adapter.get("date") is None:
+            spider.logger.warning(f"Unparseable date {raw!r} on {adapter.get('url')}")
+        return item
+
 
 class MongoPipeline:
     def __init__(self, mongo_uri, mongo_db):
@@ -44,9 +58,10 @@ class MongoPipeline:
         col = self.db[collection_name]
 
         # Upsert by URL to avoid duplicates
-        col.update_one(
-            {"url": adapter.get("url")},
-            {"$set": adapter.asdict()},
-            upsert=True,
-        )
+        doc = adapter.asdict()
+        change = {"$set": doc}
+        unset = unset_stale_date_raw(doc)
+        if unset:
+            change["$unset"] = unset
+        col.update_one({"url": adapter.get("url")}, change, upsert=True)
         return item
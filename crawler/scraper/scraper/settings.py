@@ -72,6 +72,7 @@ DEFAULT_REQUEST_HEADERS = {
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
+    "scraper.pipelines.DateNormalizationPipeline": 200,
     "scraper.pipelines.MongoPipeline": 300,
 }
 
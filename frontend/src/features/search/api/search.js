@@ -1,5 +1,8 @@
 import { apiClient } from "../../../lib/apiClient";
 
+// Everything the result card shows; `content` is replaced by snippets
+const LIST_FIELDS = "source,url,author,categories,date,excerpt,image_url,tags,title";
+
 export async function searchHacks({ query, page = 1, pageSize = 10 }) {
   if (!query || !query.trim()) {
     return { total: 0, hits: [], page: 1, page_size: pageSize, total_pages: 0 };
@@ -10,6 +13,8 @@ export async function searchHacks({ query, page = 1, pageSize = 10 }) {
       query: query.trim(),
       page,
       page_size: pageSize,
+      fields: LIST_FIELDS,
+      highlight: true,
     },
   });
 
@@ -29,6 +29,7 @@ function SearchPage({ definitionOpen, setDefinitionOpen }) {
   // Switch to  the appropriate search state
   const results = isCategoryMode ? categorySearch.hits : textSearch.results;
   const total = isCategoryMode ? categorySearch.total : textSearch.total;
+  const totalIsLowerBound = !isCategoryMode && textSearch.totalIsLowerBound;
   const page = isCategoryMode ? categorySearch.page : textSearch.page;
   const pageSize = isCategoryMode
     ? categorySearch.pageSize
@@ -116,6 +117,7 @@ function SearchPage({ definitionOpen, setDefinitionOpen }) {
       <StatusLine
         page={page}
         total={total}
+        totalIsLowerBound={totalIsLowerBound}
         totalPages={totalPages}
         pageSize={pageSize}
         error={error}
@@ -21,6 +21,23 @@ function highlightText(text, query) {
   );
 }
 
+/** Render a server snippet, marking its [start, end) highlight ranges. */
+function renderSnippet({ text, highlights }) {
+  const parts = [];
+  let pos = 0;
+  highlights.forEach(([start, end], idx) => {
+    if (start > pos) parts.push(text.slice(pos, start));
+    parts.push(
+      <mark key={idx} style={{ backgroundColor: "#fff59d" }}>
+        {text.slice(start, end)}
+      </mark>
+    );
+    pos = end;
+  });
+  parts.push(text.slice(pos));
+  return parts;
+}
+
 /** Build a snippet centered around the first occurrence of the query. */
 function buildSnippet(result, query) {
   const fullText =
@@ -64,7 +81,10 @@ function buildSnippet(result, query) {
 }
 
 function SearchResultCard({ result, query, onCategorySearch }) {
-  const snippet = buildSnippet(result, query);
+  const contentSnippet = result.snippets?.find((s) => s.path === "content");
+  const snippet = contentSnippet
+    ? renderSnippet(contentSnippet)
+    : highlightText(buildSnippet(result, query), query);
   const dateStr =
     typeof result.date === "string"
       ? result.date.slice(0, 10)
@@ -119,7 +139,7 @@ function SearchResultCard({ result, query, onCategorySearch }) {
             overflow: "hidden",
           }}
         >
-          {highlightText(snippet, query)}
+          {snippet}
         </Typography>
 
         {/* Meta line */}
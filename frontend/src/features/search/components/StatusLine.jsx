@@ -1,14 +1,24 @@
 import { Box, Typography } from "@mui/material";
 
-function StatusLine({ page, totalPages, error, loading, results, total }) {
+function StatusLine({
+  page,
+  totalPages,
+  error,
+  loading,
+  results,
+  total,
+  totalIsLowerBound = false,
+}) {
   if (!totalPages || totalPages <= 1) return null;
 
   return (
      <Box sx={{ mb: 2, minHeight: 24 }}>
         {!error && !loading && results.length > 0 && (
           <Typography variant="body2" color="text.secondary">
-            About {total} result{total === 1 ? "" : "s"} (page {page} of{" "}
-            {totalPages || 1})
+            About {total}
+            {totalIsLowerBound ? "+" : ""} result{total === 1 ? "" : "s"} (page{" "}
+            {page} of {totalPages || 1}
+            {totalIsLowerBound ? "+" : ""})
           </Typography>
         )}
       </Box>
@@ -6,6 +6,7 @@ export function useSearch(initialPageSize = 10) {
   const [query, setQuery] = useState("");
   const [results, setResults] = useState([]);
   const [total, setTotal] = useState(0);
+  const [totalIsLowerBound, setTotalIsLowerBound] = useState(false);
   const [page, setPage] = useState(1);
   const [pageSize] = useState(initialPageSize);
   const [totalPages, setTotalPages] = useState(0);
@@ -30,6 +31,7 @@ export function useSearch(initialPageSize = 10) {
 
       setResults(data.hits || []);
       setTotal(data.total || 0);
+      setTotalIsLowerBound(!!data.total_is_lower_bound);
       setPage(data.page || effectivePage);
       setTotalPages(
         data.total_pages || (data.total ? Math.ceil(data.total / pageSize) : 0)
@@ -63,6 +65,7 @@ export function useSearch(initialPageSize = 10) {
     setQuery: updateQuery,
     results,
     total,
+    totalIsLowerBound,
     page,
     pageSize,
     totalPages,